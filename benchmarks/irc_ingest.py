@@ -0,0 +1,140 @@
+"""
+Per-line cost of reading chat through twitchio versus fast_irc.
+
+    python benchmarks/irc_ingest.py [--lines recorded.txt] [--count 200000]
+
+`--lines` replays raw IRC lines captured from a real channel (one per line,
+as received). Without it, lines shaped like Twitch's are generated: mostly
+PRIVMSGs with full tags, about 1% commands, plus the odd USERNOTICE,
+CLEARCHAT and PING.
+
+Both paths hand "message" events to the same run_event, which like
+twitchio's Client.run_event starts one task per event, and the handler does
+what the bot does with every line (channel and author name) and, for
+commands, reading the author's badges. The other events twitchio
+dispatches have no handler here, as in the bot.
+"""
+import argparse
+import asyncio
+import os
+import random
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from twitchio.websocket import WSConnection
+
+from fast_irc import parse_privmsg
+
+BADGES = ["", "", "", "subscriber/12", "subscriber/3,premium/1", "vip/1", "moderator/1", "founder/0"]
+WORDS = "lol gg pog clip that no way KEKW nice run hype chat is this real again first time".split()
+
+
+def generate_lines(count, rng):
+    lines = []
+    for n in range(count):
+        user = f"viewer{rng.randint(1, 5000)}"
+        roll = rng.random()
+        if roll < 0.005:
+            lines.append("PING :tmi.twitch.tv")
+            continue
+        if roll < 0.01:
+            lines.append(f"@badge-info=;badges=;login={user};msg-id=sub;room-id=1;user-id={n};user-type= "
+                         f":tmi.twitch.tv USERNOTICE #channel :sub message")
+            continue
+        if roll < 0.015:
+            lines.append(f"@room-id=1;target-user-id={n};tmi-sent-ts=1700000000000 :tmi.twitch.tv CLEARCHAT #channel :{user}")
+            continue
+
+        badges = rng.choice(BADGES)
+        text = "!" + rng.choice(("quote", "commands", "d 20", "uptime")) if roll > 0.985 else \
+            " ".join(rng.choices(WORDS, k=rng.randint(1, 12)))
+        tags = (
+            f"badge-info=;badges={badges};client-nonce={rng.getrandbits(64):016x};color=#1E90FF;"
+            f"display-name={user.capitalize()};emotes=;first-msg=0;flags=;id={rng.getrandbits(64):016x};"
+            f"mod={int('moderator' in badges)};returning-chatter=0;room-id=1;"
+            f"subscriber={int('subscriber' in badges)};tmi-sent-ts=1700000000000;turbo=0;"
+            f"user-id={rng.randint(1, 10**8)};user-type="
+        )
+        lines.append(f"@{tags} :{user}!{user}@{user}.tmi.twitch.tv PRIVMSG #channel :{text}")
+    return lines
+
+
+class _Client:
+    """Just enough of a twitchio Client for WSConnection, and for dispatching events."""
+    nick = "bot"
+
+    def __init__(self):
+        self.tasks = []
+
+    def run_event(self, event_name, *args):
+        # Like twitchio's Client.run_event: a task per handler.
+        handler = getattr(self, f"event_{event_name}", None)
+        if handler is not None:
+            self.tasks.append(asyncio.get_running_loop().create_task(handler(*args)))
+
+    async def event_message(self, message):
+        """What the bot does with every line, and with a command line."""
+        message.channel.name
+        message.author.name
+        if message.content.startswith("!"):
+            message.author.is_mod
+            message.tags.get("user-id")
+
+
+async def bench_twitchio(lines):
+    client = _Client()
+    ws = WSConnection(loop=asyncio.get_running_loop(), heartbeat=None, client=client, token="x")
+    ws.nick = "bot"
+
+    async def ping():
+        pass
+    ws._ping = ping
+
+    start = time.perf_counter()
+    # Like WSConnection._keep_alive: one task per line.
+    tasks = [asyncio.ensure_future(ws._process_data(line)) for line in lines]
+    await asyncio.gather(*tasks)
+    await asyncio.gather(*client.tasks)
+    return time.perf_counter() - start
+
+
+async def bench_fast(lines):
+    client = _Client()
+    start = time.perf_counter()
+    # Like FastIRCReader._dispatch_lines.
+    for line in lines:
+        message = parse_privmsg(line)
+        if message is not None:
+            client.run_event("message", message)
+    await asyncio.gather(*client.tasks)
+    return time.perf_counter() - start
+
+
+def read_lines(path):
+    with open(path, encoding="utf-8") as f:
+        return [line.rstrip("\r\n") for line in f if line.strip()]
+
+
+async def run(lines, rounds):
+    best = {"twitchio": float("inf"), "fast_irc": float("inf")}
+    for _ in range(rounds):
+        best["twitchio"] = min(best["twitchio"], await bench_twitchio(lines))
+        best["fast_irc"] = min(best["fast_irc"], await bench_fast(lines))
+
+    for name, seconds in best.items():
+        print(f"{name:>9}: {seconds / len(lines) * 1e6:7.2f} us/line ({len(lines) / seconds:,.0f} lines/s)")
+    print(f"fast_irc is {best['twitchio'] / best['fast_irc']:.1f}x faster on {len(lines)} lines")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark IRC ingestion.")
+    parser.add_argument("--lines", help="File of recorded raw IRC lines.")
+    parser.add_argument("--count", type=int, default=200000, help="Number of generated lines.")
+    parser.add_argument("--rounds", type=int, default=3)
+    args = parser.parse_args()
+
+    lines = read_lines(args.lines) if args.lines else generate_lines(args.count, random.Random(1234))
+    asyncio.run(run(lines, args.rounds))
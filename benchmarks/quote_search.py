@@ -0,0 +1,90 @@
+"""
+Search latency of the quote store with a large quote database.
+
+    python benchmarks/quote_search.py [--quotes 100000] [--searches 2000]
+
+Builds a throwaway database of random quotes, then times `!quote search`
+style lookups end to end (event loop -> database thread -> result).
+"""
+import argparse
+import asyncio
+import importlib.util
+import itertools
+import os
+import random
+import statistics
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STORE_PATH = os.path.join(ROOT, "plugins", "Basic Commands", "quote_store.py")
+
+# Real chat quotes mix a few very common words with a long tail of rare ones,
+# so words are drawn from a Zipf-like distribution over a large vocabulary.
+VOCABULARY_SIZE = 20000
+
+
+def make_vocabulary(rng):
+    letters = "abcdefghijklmnopqrstuvwxyz"
+    words = set()
+    while len(words) < VOCABULARY_SIZE:
+        words.add("".join(rng.choice(letters) for _ in range(rng.randint(3, 9))))
+    words = sorted(words)
+    rng.shuffle(words)
+    weights = list(itertools.accumulate(1 / rank for rank in range(1, len(words) + 1)))
+    return words, weights
+
+
+def load_quote_store():
+    spec = importlib.util.spec_from_file_location("quote_store", STORE_PATH)
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+
+def random_quote(rng, words, weights):
+    return " ".join(rng.choices(words, cum_weights=weights, k=rng.randint(5, 20)))
+
+
+def percentile(samples, fraction):
+    return samples[min(int(len(samples) * fraction), len(samples) - 1)]
+
+
+async def run(quote_count, search_count):
+    quote_store = load_quote_store()
+    rng = random.Random(1234)
+    words, weights = make_vocabulary(rng)
+
+    with tempfile.TemporaryDirectory() as tmp:
+        store = quote_store.QuoteStore(os.path.join(tmp, "quotes.db"))
+
+        rows = [(random_quote(rng, words, weights), "bench") for _ in range(quote_count)]
+        start = time.perf_counter()
+        batch = 10000
+        for offset in range(0, quote_count, batch):
+            await store.add_quotes(rows[offset:offset + batch])
+        print(f"Inserted {quote_count} quotes in {time.perf_counter() - start:.2f}s (FTS5: {store.has_fts})")
+
+        # Searches pick words the way chatters remember them: weighted like the quotes.
+        queries = [" ".join(rng.choices(words, cum_weights=weights, k=rng.randint(1, 3))) for _ in range(search_count)]
+        queries += [rng.choice(words)[:4] for _ in range(search_count // 4)]  # prefix searches
+
+        timings = []
+        for query in queries:
+            start = time.perf_counter()
+            await store.search(query)
+            timings.append((time.perf_counter() - start) * 1000)
+        timings.sort()
+
+        print(f"{len(queries)} searches: mean {statistics.mean(timings):.3f} ms, "
+              f"p50 {percentile(timings, 0.5):.3f} ms, p99 {percentile(timings, 0.99):.3f} ms, "
+              f"max {timings[-1]:.3f} ms")
+        store.close()
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description="Benchmark quote search latency.")
+    parser.add_argument("--quotes", type=int, default=100000)
+    parser.add_argument("--searches", type=int, default=2000)
+    args = parser.parse_args()
+    asyncio.run(run(args.quotes, args.searches))
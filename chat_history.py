@@ -0,0 +1,248 @@
+import asyncio
+import collections
+import concurrent.futures
+import gzip
+import json
+import os
+import time
+from array import array
+
+# Rough per-message overhead (list slots, str headers, index entry) used for
+# the memory ceiling on top of the text itself.
+ENTRY_OVERHEAD = 120
+
+
+class ChannelRing:
+    """
+    Fixed-capacity ring of one channel's recent messages.
+
+    Messages are numbered with an ever-growing sequence number; message `seq`
+    lives in slot `seq % capacity` while `start <= seq < end`. Each user has a
+    bounded deque of their sequence numbers, oldest first, so their messages
+    can be found without scanning the ring.
+    """
+
+    def __init__(self, capacity, per_user):
+        self.capacity = capacity
+        self.per_user = per_user
+        self.times = array("d", [0.0]) * capacity
+        self.logins = [None] * capacity
+        self.texts = [None] * capacity
+        self.start = 0
+        self.end = 0
+        self.users = {}  # login -> deque of seqs
+        self.bytes = 0
+
+    def __len__(self):
+        return self.end - self.start
+
+    def append(self, timestamp, login, text):
+        slot = self.end % self.capacity
+        self.times[slot] = timestamp
+        self.logins[slot] = login
+        self.texts[slot] = text
+        seqs = self.users.get(login)
+        if seqs is None:
+            seqs = self.users[login] = collections.deque(maxlen=self.per_user)
+        seqs.append(self.end)
+        self.end += 1
+        self.bytes += len(text) + ENTRY_OVERHEAD
+
+    def pop_oldest(self):
+        """Remove the oldest message and return it as (timestamp, login, text)."""
+        slot = self.start % self.capacity
+        entry = (self.times[slot], self.logins[slot], self.texts[slot])
+        seqs = self.users.get(entry[1])
+        # Sequence numbers leave in order, so this one is at the head of the
+        # user's deque unless the per-user cap already dropped it.
+        if seqs and seqs[0] == self.start:
+            seqs.popleft()
+            if not seqs:
+                del self.users[entry[1]]
+        self.logins[slot] = self.texts[slot] = None
+        self.start += 1
+        self.bytes -= len(entry[2]) + ENTRY_OVERHEAD
+        return entry
+
+    def recent(self, login, count):
+        """The user's last `count` messages, newest first, as (timestamp, text)."""
+        seqs = self.users.get(login)
+        if not seqs:
+            return []
+        result = []
+        for seq in reversed(seqs):
+            slot = seq % self.capacity
+            result.append((self.times[slot], self.texts[slot]))
+            if len(result) == count:
+                break
+        return result
+
+    def entries(self):
+        for seq in range(self.start, self.end):
+            slot = seq % self.capacity
+            yield self.times[slot], self.logins[slot], self.texts[slot]
+
+
+class ChatHistory:
+    """
+    Recent chat messages per channel, for moderation lookups.
+
+    Each channel keeps up to `capacity` messages and every user up to
+    `per_user` of them; when all channels together go over `max_bytes`, the
+    oldest messages of the largest channel are dropped first. Lookups only
+    touch the messages they return.
+
+    With a `log_dir`, dropped messages are written to gzip segment files of
+    `segment_size` messages (newest `max_segments` kept per channel) so
+    `history()` can reach further back. Each segment starts with the list of
+    users in it, so segments without the user are skipped after one line.
+    """
+
+    def __init__(self, capacity=5000, per_user=100, max_bytes=16 * 1024 * 1024,
+                 last_seen_limit=50000, log_dir=None, segment_size=2000, max_segments=50):
+        self.capacity = capacity
+        self.per_user = per_user
+        self.max_bytes = max_bytes
+        self.last_seen_limit = last_seen_limit
+        self.log_dir = log_dir
+        self.segment_size = segment_size
+        self.max_segments = max_segments
+
+        self.channels = {}  # channel -> ChannelRing
+        self.bytes = 0
+        self.last_seen = collections.OrderedDict()  # login -> (timestamp, channel)
+        self.pending = {}   # channel -> dropped messages not yet written to the log
+        self._log_executor = None
+        if log_dir:
+            # One writer thread keeps segment writes and reads in order.
+            self._log_executor = concurrent.futures.ThreadPoolExecutor(
+                max_workers=1, thread_name_prefix="chat-history"
+            )
+
+    def record(self, channel, login, text, timestamp=None):
+        if timestamp is None:
+            timestamp = time.time()
+        ring = self.channels.get(channel)
+        if ring is None:
+            ring = self.channels[channel] = ChannelRing(self.capacity, self.per_user)
+
+        if len(ring) == ring.capacity:
+            self._drop_oldest(channel, ring)
+        before = ring.bytes
+        ring.append(timestamp, login, text)
+        self.bytes += ring.bytes - before
+
+        self.last_seen[login] = (timestamp, channel)
+        self.last_seen.move_to_end(login)
+        if len(self.last_seen) > self.last_seen_limit:
+            self.last_seen.popitem(last=False)
+
+        while self.bytes > self.max_bytes:
+            channel, ring = max(self.channels.items(), key=lambda item: item[1].bytes)
+            if len(ring) <= 1:
+                break
+            self._drop_oldest(channel, ring)
+
+    def _drop_oldest(self, channel, ring):
+        before = ring.bytes
+        entry = ring.pop_oldest()
+        self.bytes -= before - ring.bytes
+        if self._log_executor is not None:
+            pending = self.pending.setdefault(channel, [])
+            pending.append(entry)
+            if len(pending) >= self.segment_size:
+                self._write_segment(channel, self.pending.pop(channel))
+
+    # ---- Lookups ----
+
+    def seen(self, login):
+        """(timestamp, channel) of the user's last message, or None."""
+        return self.last_seen.get(login)
+
+    def recent(self, channel, login, count):
+        """The user's last `count` messages in memory, newest first, as (timestamp, text)."""
+        ring = self.channels.get(channel)
+        return ring.recent(login, count) if ring is not None else []
+
+    async def history(self, channel, login, count):
+        """Like recent(), but also looks in the segment log when memory has fewer than `count`."""
+        result = self.recent(channel, login, count)
+        if len(result) >= count or self._log_executor is None:
+            return result
+
+        for timestamp, entry_login, text in reversed(self.pending.get(channel, ())):
+            if entry_login == login:
+                result.append((timestamp, text))
+                if len(result) == count:
+                    return result
+
+        loop = asyncio.get_running_loop()
+        older = await loop.run_in_executor(
+            self._log_executor, self._read_log, channel, login, count - len(result)
+        )
+        return result + older
+
+    # ---- Segment log ----
+
+    def _channel_dir(self, channel):
+        return os.path.join(self.log_dir, channel)
+
+    def _write_segment(self, channel, entries):
+        future = self._log_executor.submit(self._write_segment_file, channel, entries)
+        future.add_done_callback(self._report_write_error)
+
+    @staticmethod
+    def _report_write_error(future):
+        if future.exception() is not None:
+            print(f"Failed to write chat history segment: {future.exception()}")
+
+    def _write_segment_file(self, channel, entries):
+        directory = self._channel_dir(channel)
+        os.makedirs(directory, exist_ok=True)
+        # Named by the first message's time in ms, so names sort oldest first.
+        name = f"{int(entries[0][0] * 1000):015d}.jsonl.gz"
+        tmp_path = os.path.join(directory, name + ".tmp")
+        with gzip.open(tmp_path, "wt", encoding="utf-8") as f:
+            f.write(json.dumps(sorted({login for _, login, _ in entries})) + "\n")
+            for entry in entries:
+                f.write(json.dumps(entry) + "\n")
+        os.replace(tmp_path, os.path.join(directory, name))
+
+        segments = self._segment_files(directory)
+        for old in segments[:-self.max_segments]:
+            os.remove(os.path.join(directory, old))
+
+    @staticmethod
+    def _segment_files(directory):
+        if not os.path.isdir(directory):
+            return []
+        return sorted(name for name in os.listdir(directory) if name.endswith(".jsonl.gz"))
+
+    def _read_log(self, channel, login, count):
+        directory = self._channel_dir(channel)
+        result = []
+        for name in reversed(self._segment_files(directory)):
+            try:
+                with gzip.open(os.path.join(directory, name), "rt", encoding="utf-8") as f:
+                    if login not in json.loads(f.readline()):
+                        continue
+                    matches = [(entry[0], entry[2]) for entry in map(json.loads, f) if entry[1] == login]
+            except (OSError, ValueError) as e:
+                print(f"Skipping unreadable chat history segment {name}: {e}")
+                continue
+            for match in reversed(matches):
+                result.append(match)
+                if len(result) == count:
+                    return result
+        return result
+
+    def close(self):
+        """Write everything still in memory to the log (if enabled) and wait for the writes."""
+        if self._log_executor is None:
+            return
+        for channel, ring in self.channels.items():
+            entries = self.pending.pop(channel, []) + list(ring.entries())
+            if entries:
+                self._write_segment(channel, entries)
+        self._log_executor.shutdown(wait=True)
+        self._log_executor = None
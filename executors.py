@@ -0,0 +1,165 @@
+import asyncio
+import concurrent.futures
+import importlib.util
+import multiprocessing
+import os
+
+# Defaults for each executor kind. Process pools start lazily, on first use.
+POOL_SETTINGS = {
+    "thread": {
+        "max_workers": 4,
+        "max_pending": 32,
+        "timeout": 10.0,
+        "recycle_after": None
+    },
+    "process": {
+        "max_workers": max(1, min(2, os.cpu_count() or 1)),
+        "max_pending": 16,
+        "timeout": 5.0,
+        "recycle_after": 500
+    }
+}
+
+
+class ExecutorBusy(Exception):
+    """Raised when a pool already has `max_pending` jobs queued or running."""
+
+
+# Modules loaded inside worker processes, keyed by file path.
+_worker_modules = {}
+
+def _invoke_in_worker(file_path, func_name, args):
+    """
+    Entry point for process workers.
+
+    Plugin and command modules are loaded from file paths rather than
+    imported, so their functions can't be pickled by reference. Instead the
+    worker loads the same file itself (once) and looks the function up by name.
+    """
+    module = _worker_modules.get(file_path)
+    if module is None:
+        module_name = os.path.splitext(os.path.basename(file_path))[0]
+        spec = importlib.util.spec_from_file_location(module_name, file_path)
+        module = importlib.util.module_from_spec(spec)
+        spec.loader.exec_module(module)
+        _worker_modules[file_path] = module
+    return getattr(module, func_name)(*args)
+
+
+class ManagedPool:
+    """
+    A thread or process pool with a bounded number of pending jobs, a
+    per-job timeout, and periodic worker recycling.
+    """
+
+    def __init__(self, kind, max_workers, max_pending, timeout, recycle_after=None):
+        if kind not in ("thread", "process"):
+            raise ValueError(f"Unknown executor kind '{kind}'.")
+        self.kind = kind
+        self.max_workers = max_workers
+        self.max_pending = max_pending
+        self.timeout = timeout
+        self.recycle_after = recycle_after
+        self.pending = 0
+        self.completed = 0
+        self._pool = None
+
+    def _get_pool(self):
+        if self._pool is None:
+            if self.kind == "process":
+                # Spawned like on Windows: forking a process that already runs
+                # threads (quote store, chat history) can deadlock the child.
+                self._pool = concurrent.futures.ProcessPoolExecutor(
+                    max_workers=self.max_workers, mp_context=multiprocessing.get_context("spawn")
+                )
+            else:
+                self._pool = concurrent.futures.ThreadPoolExecutor(
+                    max_workers=self.max_workers, thread_name_prefix="tanuki-worker"
+                )
+            self.completed = 0
+        return self._pool
+
+    def _submit(self, func, args):
+        pool = self._get_pool()
+        if self.kind == "process":
+            code = getattr(func, "__code__", None)
+            if code is None or "<locals>" in func.__qualname__:
+                raise TypeError("Only top-level functions can run in the process executor.")
+            return pool.submit(_invoke_in_worker, code.co_filename, func.__name__, args)
+        return pool.submit(func, *args)
+
+    async def run(self, func, *args, timeout=None):
+        """Run `func(*args)` in the pool and return its result on the event loop."""
+        if self.pending >= self.max_pending:
+            raise ExecutorBusy(f"The {self.kind} executor is busy.")
+
+        job = self._submit(func, args)
+        # A job counts as pending until it really finishes, not just until we
+        # stop waiting for it, so threads stuck past their timeout still fill
+        # the queue.
+        self.pending += 1
+        loop = asyncio.get_running_loop()
+        job.add_done_callback(lambda _: self._call_soon(loop, self._job_done))
+
+        future = asyncio.wrap_future(job)
+        try:
+            return await asyncio.wait_for(future, timeout or self.timeout)
+        except asyncio.TimeoutError:
+            # A stuck process worker would hold a slot forever; replace the pool.
+            if self.kind == "process":
+                print(f"Process job '{func.__name__}' timed out, recycling workers.")
+                self.recycle(terminate=True)
+            raise
+
+    @staticmethod
+    def _call_soon(loop, callback):
+        # Done callbacks run on a worker thread; the loop may be gone at shutdown.
+        if not loop.is_closed():
+            loop.call_soon_threadsafe(callback)
+
+    def _job_done(self):
+        self.pending -= 1
+        self.completed += 1
+        if self.recycle_after and self.completed >= self.recycle_after:
+            self.recycle()
+
+    def recycle(self, terminate=False):
+        """
+        Retire the current workers. Jobs already running are allowed to finish
+        unless `terminate` is set; new jobs go to a fresh pool.
+        """
+        pool, self._pool = self._pool, None
+        if pool is None:
+            return
+
+        if terminate and self.kind == "process":
+            # ProcessPoolExecutor has no public way to kill a busy worker.
+            for process in list(getattr(pool, "_processes", {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False)
+
+    def shutdown(self):
+        self.recycle(terminate=True)
+
+
+class ExecutorManager:
+    """Holds one ManagedPool per executor kind, shared by all plugins."""
+
+    def __init__(self, settings=None):
+        settings = settings or POOL_SETTINGS
+        self.pools = {kind: ManagedPool(kind, **options) for kind, options in settings.items()}
+
+    async def run(self, kind, func, *args, timeout=None):
+        pool = self.pools.get(kind)
+        if pool is None:
+            raise ValueError(f"Unknown executor kind '{kind}'.")
+        return await pool.run(func, *args, timeout=timeout)
+
+    def recycle(self):
+        """Replace all workers, e.g. after plugins were reloaded with new code."""
+        for pool in self.pools.values():
+            pool.recycle()
+
+    def shutdown(self):
+        for pool in self.pools.values():
+            pool.shutdown()
@@ -0,0 +1,306 @@
+import asyncio
+import time
+import traceback
+from collections import deque
+
+import aiohttp
+
+IRC_URL = "wss://irc-ws.chat.twitch.tv:443"
+
+# Seconds to wait before reconnecting, doubling up to the last value.
+RECONNECT_DELAYS = (1, 2, 4, 8, 16, 30)
+
+MAX_MESSAGE_LENGTH = 500
+
+# Twitch's chat rate limit, the same numbers twitchio's send() enforces:
+# messages per RATE_PERIOD seconds in a channel, higher where the bot is a
+# moderator (or the broadcaster).
+RATE_PERIOD = 30
+RATE_LIMIT = 20
+MOD_RATE_LIMIT = 100
+
+
+def parse_privmsg(line):
+    """
+    Parse a chat line such as
+    "@badges=moderator/1;...;user-id=1 :foo!foo@foo.tmi.twitch.tv PRIVMSG #chan :hi".
+
+    Returns a ChatLine, or None for anything that isn't a channel message.
+    Only the positions of the parts are looked up here; the tags are split
+    into a dict the first time someone asks for them.
+    """
+    if line[0] == "@":
+        space = line.find(" ")
+        tags = line[1:space]
+        prefix_start = space + 1
+    else:
+        tags = ""
+        prefix_start = 0
+
+    if line[prefix_start] != ":":
+        return None
+    command_start = line.find(" ", prefix_start) + 1
+    if not line.startswith("PRIVMSG #", command_start):
+        return None
+
+    login = line[prefix_start + 1:line.find("!", prefix_start, command_start)]
+    channel_start = command_start + 9
+    channel_end = line.find(" ", channel_start)
+    if channel_end < 0:
+        return None
+    content = line[channel_end + 2:] if line.startswith(" :", channel_end) else line[channel_end + 1:]
+    return ChatLine(line, tags, login, line[channel_start:channel_end], content)
+
+
+def split_tags(tags):
+    result = {}
+    for tag in tags.split(";"):
+        key, _, value = tag.partition("=")
+        result[key] = value
+    return result
+
+
+class ChatLine:
+    """
+    A chat message read by FastIRCReader.
+
+    Has the parts of a twitchio Message that plugins use (`content`, `echo`,
+    `tags`, `author`, `channel`), but those are only built when first
+    accessed, and the tags only split when something needs them, which for
+    most chat lines is never.
+    """
+
+    __slots__ = ("raw_data", "_tags_raw", "login", "channel_name", "content", "echo",
+                 "reader", "_tags", "_author", "_channel")
+
+    def __init__(self, raw_data, tags_raw, login, channel_name, content):
+        self.raw_data = raw_data
+        self._tags_raw = tags_raw
+        self.login = login
+        self.channel_name = channel_name
+        self.content = content
+        self.echo = False
+        self.reader = None
+        self._tags = None
+        self._author = None
+        self._channel = None
+
+    @property
+    def tags(self):
+        if self._tags is None:
+            self._tags = split_tags(self._tags_raw) if self._tags_raw else {}
+        return self._tags
+
+    @property
+    def author(self):
+        if self._author is None:
+            self._author = FastChatter(self.login, self)
+        return self._author
+
+    @property
+    def channel(self):
+        if self._channel is None:
+            self._channel = FastChannel(self.channel_name, self.reader)
+        return self._channel
+
+
+class FastChatter:
+    """The author of a ChatLine. Badges and the other tags are read on first use."""
+
+    def __init__(self, name, line):
+        self.name = name
+        self._line = line
+        self._badges = None
+
+    @property
+    def _tags(self):
+        return self._line.tags
+
+    @property
+    def channel(self):
+        return self._line.channel
+
+    @property
+    def badges(self):
+        if self._badges is None:
+            self._badges = {}
+            for badge in (self._tags.get("badges") or "").split(","):
+                if badge:
+                    badge_name, _, version = badge.partition("/")
+                    self._badges[badge_name] = version
+        return self._badges
+
+    @property
+    def id(self):
+        return self._tags.get("user-id")
+
+    @property
+    def display_name(self):
+        return self._tags.get("display-name") or self.name
+
+    @property
+    def is_broadcaster(self):
+        return "broadcaster" in self.badges
+
+    @property
+    def is_mod(self):
+        return self._tags.get("mod") == "1" or "moderator" in self.badges or self.is_broadcaster
+
+    @property
+    def is_vip(self):
+        return "vip" in self.badges or bool(self._tags.get("vip"))
+
+    @property
+    def is_subscriber(self):
+        return self._tags.get("subscriber") == "1" or "subscriber" in self.badges or "founder" in self.badges
+
+    async def send(self, content):
+        await self.channel.send(content)
+
+
+class FastChannel:
+    """A channel the reader has joined; sends go over the reader's own connection."""
+
+    def __init__(self, name, reader):
+        self.name = name
+        self._reader = reader
+
+    async def send(self, content):
+        await self._reader.send(self.name, content)
+
+
+class FastIRCReader:
+    """
+    Reads chat straight from Twitch's IRC WebSocket instead of through twitchio.
+
+    twitchio builds a Channel, Chatter and Message (and updates its chatter
+    cache) for every line before any handler sees it. This reader finds the
+    channel, login and text by position, dispatches a ChatLine as the usual
+    "message" event and leaves everything else for when it is asked for.
+    Replies go out over the same connection, which has joined the channels.
+    """
+
+    def __init__(self, bot, channels, url=IRC_URL):
+        self.bot = bot
+        self.channels = [channel.lower().lstrip("#") for channel in channels]
+        self.url = url
+        self.nick = None
+        self._session = None
+        self._ws = None
+        self._task = None
+        self.sent = {}             # channel -> deque of monotonic send times
+        self.mod_channels = set()  # channels where USERSTATE says the bot is a moderator
+
+    def start(self, nick):
+        self.nick = nick
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._run())
+
+    def channel(self, name):
+        name = name.lower()
+        return FastChannel(name, self) if name in self.channels else None
+
+    async def send(self, channel, content):
+        content = content.replace("\r", " ").replace("\n", " ")
+        if len(content) > MAX_MESSAGE_LENGTH:
+            content = content[:MAX_MESSAGE_LENGTH]
+        await self._wait_for_rate_limit(channel)
+        if self._ws is None or self._ws.closed:
+            print(f"Not connected to chat; dropped a message for #{channel}.")
+            return
+        await self._ws.send_str(f"PRIVMSG #{channel} :{content}\r\n")
+
+    async def _wait_for_rate_limit(self, channel):
+        """Hold a message back until it fits in the channel's rate limit, instead of Twitch dropping it."""
+        sent = self.sent.setdefault(channel, deque())
+        while True:
+            limit = MOD_RATE_LIMIT if channel in self.mod_channels else RATE_LIMIT
+            now = time.monotonic()
+            while sent and now - sent[0] >= RATE_PERIOD:
+                sent.popleft()
+            if len(sent) < limit:
+                sent.append(now)
+                return
+            await asyncio.sleep(sent[0] + RATE_PERIOD - now)
+
+    def _note_userstate(self, line):
+        """Track whether the bot is a moderator in a channel, from a USERSTATE line."""
+        if line[0] != "@":
+            return
+        tags = split_tags(line[1:line.find(" ")])
+        channel = line[line.find(" USERSTATE #") + 12:].strip()
+        if tags.get("mod") == "1" or "broadcaster/" in tags.get("badges", ""):
+            self.mod_channels.add(channel)
+        else:
+            self.mod_channels.discard(channel)
+
+    async def _run(self):
+        attempt = 0
+        while True:
+            try:
+                if await self._read():
+                    attempt = 0
+            except (aiohttp.ClientError, OSError) as e:
+                print(f"Chat connection failed: {e}")
+            except Exception as e:
+                # Anything else (a bad line, a bug) must not stop chat for good.
+                print(f"Chat connection failed: {e}")
+                traceback.print_exc()
+            delay = RECONNECT_DELAYS[min(attempt, len(RECONNECT_DELAYS) - 1)]
+            attempt += 1
+            print(f"Reconnecting to chat in {delay}s...")
+            await asyncio.sleep(delay)
+
+    async def _read(self):
+        """One connection, until it drops. Returns True if it logged in."""
+        if self._session is None:
+            self._session = aiohttp.ClientSession()
+        # The token is read on every connect, so a refreshed token is picked up.
+        token = self.bot.oauth_data["oauth_token"]
+        async with self._session.ws_connect(self.url, heartbeat=None) as ws:
+            self._ws = ws
+            try:
+                await ws.send_str("CAP REQ :twitch.tv/tags twitch.tv/commands\r\n")
+                await ws.send_str(f"PASS oauth:{token}\r\n")
+                await ws.send_str(f"NICK {self.nick}\r\n")
+                await ws.send_str("JOIN " + ",".join(f"#{channel}" for channel in self.channels) + "\r\n")
+                return await self._dispatch_lines(ws)
+            finally:
+                self._ws = None
+
+    async def _dispatch_lines(self, ws):
+        connected = False
+        run_event = self.bot.run_event
+        async for msg in ws:
+            if msg.type != aiohttp.WSMsgType.TEXT:
+                break
+            for line in msg.data.split("\r\n"):
+                if not line:
+                    continue
+                chat_line = parse_privmsg(line)
+                if chat_line is not None:
+                    chat_line.reader = self
+                    run_event("message", chat_line)
+                elif " USERSTATE #" in line:
+                    self._note_userstate(line)
+                elif line.startswith("PING"):
+                    await ws.send_str("PONG" + line[4:] + "\r\n")
+                elif " 001 " in line:
+                    connected = True
+                elif " RECONNECT" in line:
+                    return connected
+                elif " NOTICE * :" in line:
+                    print(f"Chat login failed: {line.split(' NOTICE * :', 1)[1]}")
+                    return False
+        return connected
+
+    async def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        if self._ws is not None:
+            await self._ws.close()
+            self._ws = None
+        if self._session is not None:
+            await self._session.close()
+            self._session = None
@@ -0,0 +1,51 @@
+import aiohttp
+
+HELIX_URL = "https://api.twitch.tv/helix/"
+
+
+class HelixClient:
+    """
+    One aiohttp session shared by everything that calls the Helix API.
+
+    The auth headers are kept in a single dict that is replaced as a whole
+    when the token changes, so a request in flight always sees either the old
+    or the new token, never a mix.
+    """
+
+    def __init__(self, client_id, oauth_token, base_url=HELIX_URL):
+        self.client_id = client_id
+        self.base_url = base_url
+        self.headers = {}
+        self.session = None
+        # Called (without awaiting) when a request comes back 401.
+        self.on_unauthorized = None
+        self.set_token(oauth_token)
+
+    def set_token(self, oauth_token):
+        self.token = oauth_token
+        self.headers = {
+            "Authorization": f"Bearer {oauth_token}",
+            "Client-Id": self.client_id
+        }
+
+    async def request(self, method, path, params=None, json=None):
+        """
+        Call a Helix endpoint, e.g. request("GET", "games", params={"name": "Celeste"}).
+        Returns (status, body) where body is the decoded JSON, or the raw text
+        for non-JSON responses such as 204s and errors.
+        """
+        if self.session is None or self.session.closed:
+            self.session = aiohttp.ClientSession()
+
+        async with self.session.request(method, self.base_url + path, headers=self.headers,
+                                        params=params, json=json) as response:
+            if response.status == 401 and self.on_unauthorized is not None:
+                self.on_unauthorized()
+            if response.content_type == "application/json":
+                return response.status, await response.json()
+            return response.status, await response.text()
+
+    async def close(self):
+        if self.session is not None:
+            await self.session.close()
+            self.session = None
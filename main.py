@@ -1,31 +1,73 @@
 import json
 import os
+import sys
+import time
+import argparse
 import importlib.util
 import asyncio
+import signal
 import traceback
-import aiohttp
 from twitchio.ext import commands
 
-async def fetch_broadcaster_id(oauth_token, client_id, username):
+from chat_history import ChatHistory
+from executors import ExecutorManager
+from fast_irc import FastIRCReader
+from helix import HelixClient
+from scheduler import Scheduler
+from snapshots import SnapshotManager
+from tokens import TokenManager
+
+SNAPSHOT_FILE = "state.snapshot"
+
+async def fetch_broadcaster_id(helix, username):
     """Fetch the broadcaster's user ID from the Helix API using their username."""
-    url = f"https://api.twitch.tv/helix/users?login={username}"
-    headers = {
-        "Authorization": f"Bearer {oauth_token}",
-        "Client-Id": client_id
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                if "data" in data and len(data["data"]) > 0:
-                    return data["data"][0]["id"]
-            else:
-                print(f"Failed to fetch broadcaster_id: {response.status} - {await response.text()}")
+    status, data = await helix.request("GET", "users", params={"login": username})
+    if status == 200:
+        if "data" in data and len(data["data"]) > 0:
+            return data["data"][0]["id"]
+    else:
+        print(f"Failed to fetch broadcaster_id: {status} - {data}")
     return None
 
-def load_oauth():
-    """Load OAuth credentials from oauth.json."""
+class StartupTimings:
+    """
+    Records when each startup step started and finished and prints a
+    breakdown once the bot is ready. Steps are shown as spans from process
+    start, so it is visible which ones actually overlapped.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.steps = []
+
+    def _record(self, name, start):
+        self.steps.append((name, start - self.started, time.perf_counter() - self.started))
+
+    def measure_sync(self, name, func, *args):
+        start = time.perf_counter()
+        try:
+            return func(*args)
+        finally:
+            self._record(name, start)
+
+    async def measure(self, name, coro):
+        start = time.perf_counter()
+        try:
+            return await coro
+        finally:
+            self._record(name, start)
+
+    def report(self):
+        print("Startup timings (from start to end of each step):")
+        for name, start, end in sorted(self.steps, key=lambda step: step[1]):
+            print(f"  {name:<24}{start * 1000:6.0f} - {end * 1000:6.0f} ms")
+        print(f"  {'ready for commands after':<24}{(time.perf_counter() - self.started) * 1000:15.0f} ms")
+
+def load_oauth(interactive=True):
+    """
+    Load OAuth credentials from oauth.json.
+    When not interactive (daemon mode), exit on the first problem instead of waiting for input.
+    """
     while True:
         try:
             if not os.path.exists("oauth.json"):
@@ -51,10 +93,12 @@ def load_oauth():
         except json.JSONDecodeError:
             print("ERROR: 'oauth.json' is not valid JSON. Please check the file format.")
 
+        if not interactive:
+            sys.exit(1)
         input("Press Enter to try again...")
 
 class TanukiTechBot(commands.Bot):
-    def __init__(self, oauth_data):
+    def __init__(self, oauth_data, history_log=None, fast_irc=False):
         print("============================================")
         print("Welcome to Tanuki Tech Bot!")
         print("Initializing...")
@@ -63,19 +107,59 @@ class TanukiTechBot(commands.Bot):
         self.oauth_data = oauth_data
         self.channels = oauth_data.get("channels", [])
 
+        # With fast_irc, chat is read by FastIRCReader instead; twitchio joins
+        # no channels, so it doesn't parse every chat line a second time.
+        self.fast_irc = FastIRCReader(self, self.channels) if fast_irc else None
+
         super().__init__(
             token=oauth_data.get("oauth_token", ""),
             prefix="!",
-            initial_channels=self.channels
+            initial_channels=[] if fast_irc else self.channels
         )
         self.plugins = []
 
+        # Shared thread/process pools for CPU-heavy command work.
+        self.executors = ExecutorManager()
+
+        # Plugin state that should survive restarts and reloads.
+        self.snapshots = SnapshotManager(SNAPSHOT_FILE)
+        self.snapshots.load()
+
+        # Timers and delayed actions for all plugins share one scheduler task.
+        self.scheduler = Scheduler()
+
+        # Shared Helix client; the token manager swaps its token when refreshing.
+        self.helix = HelixClient(oauth_data.get("client_id"), oauth_data.get("oauth_token", ""))
+        self.tokens = TokenManager(oauth_data, on_token_changed=self.apply_token)
+        self.helix.on_unauthorized = self.tokens.request_check
+
+        # Recent chat per channel for !lastseen and !history, optionally logged to disk.
+        self.history = ChatHistory(log_dir=history_log)
+
+    def apply_token(self, oauth_token):
+        """Start using a refreshed token for Helix calls and future IRC reconnects."""
+        self.helix.set_token(oauth_token)
+        # twitchio has no public way to change the token of a running client.
+        self._http.token = oauth_token
+        self._connection._token = oauth_token
+
+    def get_channel(self, name):
+        if self.fast_irc is not None:
+            return self.fast_irc.channel(name)
+        return super().get_channel(name)
+
     def load_plugins(self):
         """
         Load or reload plugins from the plugins folder.
         Each plugin should reside in its own directory inside 'plugins/'.
         We will only search the first level directories for a main plugin file.
         """
+        # Workers may still hold the old plugin code; start fresh ones.
+        self.executors.recycle()
+
+        # Keep the state of the current plugins so the reloaded ones can pick it up.
+        self.snapshots.capture()
+
         plugins = []
         PLUGINS_FOLDER = "plugins"
         VALID_PLUGIN_ENTRY_FILES = ["__init__.py", "plugin.py", "main.py"]  # Define acceptable entry filenames
@@ -125,19 +209,75 @@ class TanukiTechBot(commands.Bot):
     
         return plugins
 
+    async def resolve_broadcaster_id(self):
+        """Look up the broadcaster_id for the first channel and store it in oauth_data."""
+        broadcaster_name = self.channels[0] if self.channels else None
+        if not broadcaster_name:
+            print("No channels found in oauth.json, unable to fetch broadcaster_id.")
+            return None
+
+        broadcaster_id = await fetch_broadcaster_id(self.helix, broadcaster_name)
+        if broadcaster_id:
+            self.oauth_data["broadcaster_id"] = broadcaster_id
+        else:
+            print(f"Could not fetch broadcaster_id for {broadcaster_name}.")
+        return broadcaster_id
+
+    async def run_startup(self, timings, daemon=False):
+        """
+        Start everything on this one event loop. The broadcaster lookup, token
+        validation and IRC connection are network-bound, so they are started
+        first. Loading plugins is synchronous and holds the loop, so only the
+        part of each request that runs outside it (DNS lookups in the resolver
+        thread, TCP connects in the kernel) overlaps with it; the rest of the
+        requests continues once plugins are loaded.
+        """
+        broadcaster_task = self.loop.create_task(timings.measure("broadcaster id", self.resolve_broadcaster_id()))
+        token_task = self.loop.create_task(timings.measure("token validation", self.tokens.validate()))
+        irc_task = self.loop.create_task(self.start())
+        ready_task = self.loop.create_task(timings.measure("irc connection", self.wait_for_ready()))
+        # Let the tasks run up to their first real I/O wait before the loop is blocked.
+        await asyncio.sleep(0)
+
+        self.plugins = timings.measure_sync("plugins", self.load_plugins)
+        print(f"Loaded {len(self.plugins)} plugins.")
+        self.snapshots.start(self.loop)
+        self.scheduler.start(self.loop)
+
+        broadcaster_id, token_data = await asyncio.gather(broadcaster_task, token_task)
+
+        # Without a valid token nothing will work; without the broadcaster_id
+        # only the Helix commands fail, so that is only fatal in daemon mode.
+        if token_data is None or (daemon and broadcaster_id is None):
+            print("Startup failed, shutting down.")
+            ready_task.cancel()
+            irc_task.cancel()
+            await asyncio.gather(ready_task, irc_task, return_exceptions=True)
+            sys.exit(1)
+        print(f"Token for {token_data.get('login')} is valid for another {token_data.get('expires_in', 0) // 60} minutes.")
+        self.tokens.start(self.scheduler)
+        if self.fast_irc is not None:
+            self.fast_irc.start(token_data.get("login"))
+
+        # If the connection fails, irc_task finishes first and raises below.
+        await asyncio.wait({ready_task, irc_task}, return_when=asyncio.FIRST_COMPLETED)
+        if ready_task.done():
+            timings.report()
+        else:
+            ready_task.cancel()
+
+        # Attempt to listen for plugin reload via keyboard input (F5)
+        if not daemon:
+            await self.attempt_keyboard_reload()
+
+        await irc_task
+
     async def event_ready(self):
         print("============================================")
         print(f"Logged in as {self.nick}")
         print(f"Connected to channel(s): {', '.join(self.channels)}")
         print("============================================")
 
-        # Load plugins
-        self.plugins = self.load_plugins()
-        print(f"Loaded {len(self.plugins)} plugins.")
-
-        # Attempt to listen for plugin reload via keyboard input (F5)
-        await self.attempt_keyboard_reload()
-
     async def attempt_keyboard_reload(self):
         """Try importing 'keyboard' and if successful, listen for F5 to reload plugins."""
         print("Attempting to enable plugin reloading via F5...")
@@ -167,10 +307,29 @@ class TanukiTechBot(commands.Bot):
             except Exception as e:
                 print(f"Error during plugin reload: {e}")
 
+    async def close(self):
+        # Unloading the plugins writes out their pending data, such as batched
+        # counter changes, and hands their state to the snapshot saved below.
+        for name in list(self.cogs):
+            self.remove_cog(name)
+        self.tokens.close()
+        self.scheduler.close()
+        self.snapshots.close()
+        self.executors.shutdown()
+        self.history.close()
+        if self.fast_irc is not None:
+            await self.fast_irc.close()
+        await self.helix.close()
+        await super().close()
+
     async def event_message(self, message):
         if message.echo:
             return
 
+        # Chat activity gate for timers
+        self.scheduler.note_message(message.channel.name)
+        self.history.record(message.channel.name, message.author.name, message.content)
+
         #await self.handle_commands(message)
 
     @commands.command(name="hello")
@@ -187,32 +346,40 @@ class TanukiTechBot(commands.Bot):
             await ctx.send("Only the broadcaster can reload plugins.")
 
 
+async def run_bot(oauth_data, timings, daemon, history_log=None, fast_irc=False):
+    bot = TanukiTechBot(oauth_data, history_log, fast_irc)
+    loop = asyncio.get_running_loop()
+    closing = []
+    try:
+        # Services and containers stop the bot with SIGTERM; shut down as cleanly as on Ctrl+C.
+        loop.add_signal_handler(signal.SIGTERM, lambda: closing.append(loop.create_task(bot.close())))
+    except NotImplementedError:
+        pass  # No SIGTERM handlers on Windows.
+    await bot.run_startup(timings, daemon)
+    await asyncio.gather(*closing)
+
+
 if __name__ == "__main__":
-    # Load OAuth data first
-    oauth_data = load_oauth()
-
-    # Attempt to fetch broadcaster_id before creating the bot
-    broadcaster_name = oauth_data["channels"][0] if oauth_data["channels"] else None
-    if broadcaster_name:
-        # Instead of calling asyncio.run() here, we'll create a temporary loop:
-        temp_loop = asyncio.new_event_loop()
-        asyncio.set_event_loop(temp_loop)
-        broadcaster_id = temp_loop.run_until_complete(fetch_broadcaster_id(
-            oauth_data["oauth_token"], oauth_data["client_id"], broadcaster_name
-        ))
-        temp_loop.close()
-
-        # After we are done fetching, we can create a fresh event loop for the bot.
-        asyncio.set_event_loop(asyncio.new_event_loop())
+    parser = argparse.ArgumentParser(description="Tanuki Tech Bot")
+    parser.add_argument(
+        "--daemon", action="store_true",
+        help="Never wait for keyboard input, and exit on startup errors instead of retrying."
+    )
+    parser.add_argument(
+        "--history-log", metavar="DIR",
+        help="Keep chat history older than what fits in memory in compressed files in DIR."
+    )
+    parser.add_argument(
+        "--fast-irc", action="store_true",
+        help="Read chat with the built-in IRC reader instead of twitchio (less work per chat line)."
+    )
+    args = parser.parse_args()
 
-        if broadcaster_id:
-            oauth_data["broadcaster_id"] = broadcaster_id
-        else:
-            print(f"Could not fetch broadcaster_id for {broadcaster_name}.")
-    else:
-        print("No channels found in oauth.json, unable to fetch broadcaster_id.")
+    timings = StartupTimings()
+    oauth_data = timings.measure_sync("load oauth.json", load_oauth, not args.daemon)
 
-    # Now instantiate the bot after ensuring a default event loop exists.
-    asyncio.set_event_loop(asyncio.new_event_loop())  # Create and set a clean loop for the bot
-    bot = TanukiTechBot(oauth_data)
-    bot.run()
+    # A single event loop runs the whole startup and then the bot itself.
+    try:
+        asyncio.run(run_bot(oauth_data, timings, args.daemon, args.history_log, args.fast_irc))
+    except KeyboardInterrupt:
+        pass
@@ -1,7 +1,11 @@
 import os
+import asyncio
+import concurrent.futures
 import importlib.util
 from twitchio.ext import commands
 
+from executors import ExecutorBusy
+
 metadata = {
     "name": "Commands Plugin",
     "version": "2.4",
@@ -9,16 +13,104 @@ metadata = {
     "description": "A plugin to handle custom chat commands dynamically."
 }
 
+PLUGIN_DIR = os.path.dirname(__file__)
+
+def load_plugin_module(filename):
+    """Load a helper module that lives next to this file (the plugin folder is not a package)."""
+    module_name = os.path.splitext(filename)[0]
+    spec = importlib.util.spec_from_file_location(module_name, os.path.join(PLUGIN_DIR, filename))
+    module = importlib.util.module_from_spec(spec)
+    spec.loader.exec_module(module)
+    return module
+
+data_file = load_plugin_module("data_file.py")
+templates = load_plugin_module("templates.py")
+command_index = load_plugin_module("command_index.py")
+roles = load_plugin_module("roles.py")
+timers = load_plugin_module("timers.py")
+quote_store = load_plugin_module("quote_store.py")
+helix_lookups = load_plugin_module("helix_lookups.py")
+shoutouts = load_plugin_module("shoutouts.py")
+
+DATA_FILE = os.path.join(PLUGIN_DIR, "resources", "data.json")
+QUOTES_DB = os.path.join(PLUGIN_DIR, "resources", "quotes.db")
+
+# Bump when the layout returned by CommandsPlugin.dump_state changes.
+SNAPSHOT_VERSION = 1
+
 USER_LEVELS = {
     "viewer": 0,
-    "moderator": 1,
-    "broadcaster": 2
+    "follower": 1,
+    "subscriber": 2,
+    "vip": 3,
+    "moderator": 4,
+    "broadcaster": 5
 }
+LEVEL_NAMES = {number: name for name, number in USER_LEVELS.items()}
+
+# Command files written before named levels used 0/1/2 for these.
+LEGACY_LEVELS = {0: "viewer", 1: "moderator", 2: "broadcaster"}
 
 class CommandsPlugin(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
+        self.quotes = quote_store.QuoteStore(QUOTES_DB)
+        self.quotes.start(bot.loop)
+        self.roles = roles.RoleResolver(bot, USER_LEVELS, DATA_FILE, data_file.read_data_file, data_file.update_data_file)
+        self.templates = templates.TemplateEngine(bot, self.quotes)
+        self.trigger_index = command_index.TriggerIndex()
+        self.suggestion_limiter = command_index.SuggestionLimiter()
+        self.command_listing = command_index.CommandListing(USER_LEVELS.values())
         self.CUSTOM_COMMANDS = self.load_commands()
+        self.file_commands = set(self.CUSTOM_COMMANDS)
+        self.refresh_command_index()
+        self.timers = timers.TimerManager(bot, DATA_FILE, data_file.read_data_file, data_file.update_data_file)
+        self.timers.start_all()
+        self.lookups = helix_lookups.HelixLookups(bot)
+        self.shoutouts = shoutouts.ShoutoutQueue(bot)
+
+        # Restores commands and caches from before the last restart or reload.
+        bot.snapshots.register("CommandsPlugin", SNAPSHOT_VERSION, self.dump_state, self.restore_state)
+
+    def cog_unload(self):
+        self.timers.close()
+        # Writes out pending counter changes before a reload replaces this cog.
+        self.quotes.close()
+        self.lookups.close()
+        self.shoutouts.close()
+        self.bot.snapshots.unregister("CommandsPlugin")
+
+    def dump_state(self):
+        """State worth keeping across restarts, as plain data for the snapshot."""
+        runtime_commands = {
+            command: {
+                "response": details.get("response"),
+                "level": LEVEL_NAMES[details["level"]],
+                "aliases": details.get("aliases", [])
+            }
+            for command, details in self.CUSTOM_COMMANDS.items()
+            if command not in self.file_commands and not details.get("callback")
+        }
+        return {
+            "commands": runtime_commands,
+            "follows": self.roles.dump_state(),
+            "helix_cache": self.templates.dump_state(),
+            "suggestions": self.suggestion_limiter.dump_state(),
+            "lookups": self.lookups.dump_state(),
+            "shoutouts": self.shoutouts.dump_state()
+        }
+
+    def restore_state(self, state):
+        for command, details in state.get("commands", {}).items():
+            # Command files win over a runtime command of the same name.
+            if command not in self.CUSTOM_COMMANDS and details.get("response"):
+                details["template"] = self.templates.compile(details["response"])
+                self.add_command(command, details)
+        self.roles.restore_state(state.get("follows", []))
+        self.templates.restore_state(state.get("helix_cache", {}))
+        self.suggestion_limiter.restore_state(state.get("suggestions", {}))
+        self.lookups.restore_state(state.get("lookups", {}))
+        self.shoutouts.restore_state(state.get("shoutouts", {}))
 
     def load_commands(self):
         """
@@ -27,14 +119,25 @@ class CommandsPlugin(commands.Cog):
 
         COMMAND_DEFINITION = {
             "!command": {
-                "response": "Some response text or None",
-                "level": 0,
+                "response": "Some response text, may use $(user), $(count), ... or None",
+                "level": "viewer" (a USER_LEVELS name; legacy 0/1/2 still work),
                 "aliases": ["!alias1", "!alias2"],
-                "callback": async function or None
+                "callback": async function or None,
+                "executor": "thread", "process" or None (optional),
+                "timeout": seconds (optional),
+                "min_follow_days": days (optional, how long followers must have followed),
+                "scopes": ["channel:manage:broadcast"] (optional, OAuth scopes the callback needs)
             }
         }
+
+        Callbacks of commands with an executor pass their CPU-heavy work to
+        `await ctx.compute(func, *args)`, which runs it in the bot's shared
+        pool of that kind. Process jobs must be top-level functions.
+
+        Responses are compiled into templates here, once, rather than
+        parsed every time the command is used.
         """
-        commands_dir = os.path.join(os.path.dirname(__file__), "commands")
+        commands_dir = os.path.join(PLUGIN_DIR, "commands")
         custom_commands = {}
 
         if not os.path.isdir(commands_dir):
@@ -51,19 +154,61 @@ class CommandsPlugin(commands.Cog):
 
                 if hasattr(module, "COMMAND_DEFINITION"):
                     for cmd, details in module.COMMAND_DEFINITION.items():
+                        details["level"] = self.resolve_level(details.get("level", 0), cmd)
+                        if details.get("scopes"):
+                            self.bot.tokens.require_scopes(cmd, details["scopes"])
+                        if details.get("response"):
+                            details["template"] = self.templates.compile(details["response"])
                         custom_commands[cmd] = details
                 else:
                     print(f"WARNING: {filename} does not define COMMAND_DEFINITION. Skipping...")
 
         return custom_commands
 
-    def get_user_level(self, user):
-        if user.is_broadcaster:
-            return USER_LEVELS["broadcaster"]
-        elif user.is_mod:
-            return USER_LEVELS["moderator"]
+    def refresh_command_index(self):
+        """Rebuild the suggestion index and !commands pages from CUSTOM_COMMANDS."""
+        self.trigger_index.rebuild(self.CUSTOM_COMMANDS)
+        self.command_listing.invalidate()
+
+    def add_command(self, command, details):
+        """Register a command at runtime, keeping the index and listing in sync."""
+        details["level"] = self.resolve_level(details.get("level", 0), command)
+        self.CUSTOM_COMMANDS[command] = details
+        self.trigger_index.add(command, details)
+        self.command_listing.invalidate()
+
+    async def suggest_command(self, message, trigger):
+        """Reply with similar commands when someone mistypes one."""
+        if len(trigger) < 3:
+            return
+        suggestions = self.trigger_index.suggest(trigger, self.roles.badge_level(message))
+        # Only a suggestion actually sent counts against the user's window, so
+        # another bot's command right before a real typo doesn't use it up.
+        if suggestions and self.suggestion_limiter.allow(message.author.name):
+            await message.channel.send(f"Did you mean {' or '.join(suggestions)}?")
+
+    def resolve_level(self, level, command=None):
+        """
+        Turn a USER_LEVELS name into its number. Numbers are read with their
+        old meaning (0 viewer, 1 moderator, 2 broadcaster) so older command
+        files don't silently lose their permission checks.
+        """
+        if isinstance(level, str):
+            return USER_LEVELS[level.lower()]
+        name = LEGACY_LEVELS.get(level)
+        if name is None:
+            print(f"WARNING: {command} has unknown level {level!r}; only the broadcaster can use it.")
+            name = "broadcaster"
         else:
-            return USER_LEVELS["viewer"]
+            print(f"WARNING: {command} uses numeric level {level}; treating it as '{name}'. Use the level name instead.")
+        return USER_LEVELS[name]
+
+    def get_user_level(self, user):
+        """
+        Level of a chatter from their badges and grants only. Inside command
+        callbacks use `ctx.user_level`, which also covers Helix-derived roles.
+        """
+        return self.roles.level_of(self.roles.chatter_roles(user))
 
     @commands.Cog.event()
     async def event_message(self, message):
@@ -72,61 +217,95 @@ class CommandsPlugin(commands.Cog):
 
         # Convert message to lowercase for matching commands
         content_lower = message.content.strip().lower()
+        trigger = content_lower.split(" ")[0]
 
         for command, details in self.CUSTOM_COMMANDS.items():
             # Check if the message matches the command or one of its aliases
             all_triggers = [command] + details.get("aliases", [])
-            if content_lower.split(" ")[0] in all_triggers:
-                user_level = self.get_user_level(message.author)
-                if user_level >= details["level"]:
+            if trigger in all_triggers:
+                # Roles are resolved once here and handed to the callback on ctx.
+                user_roles = await self.roles.resolve(message, details["level"], details.get("min_follow_days", 0))
+                if user_roles.level >= details["level"]:
+                    # Known-missing scopes fail here instead of after a Helix round trip.
+                    missing_scopes = self.bot.tokens.missing_scopes(details.get("scopes"))
+                    if missing_scopes:
+                        await message.channel.send(f"The bot's token lacks the {', '.join(sorted(missing_scopes))} scope(s) for {command}.")
+                        return
+
                     callback = details.get("callback")
 
                     # A minimal ctx-like object for callback convenience
                     class Ctx:
-                        def __init__(self, message, bot):
+                        def __init__(self, message, bot, details, user_roles):
                             self.message = message
                             self.channel = message.channel
                             self.author = message.author
                             self.bot = bot
+                            self.roles = user_roles
+                            self.user_level = user_roles.level
+                            self.executor = details.get("executor")
+                            self.timeout = details.get("timeout")
                         async def send(self, content):
                             await self.channel.send(content)
+                        async def compute(self, func, *args):
+                            if not self.executor:
+                                return func(*args)
+                            return await self.bot.executors.run(self.executor, func, *args, timeout=self.timeout)
 
-                    ctx = Ctx(message, self.bot)
-
-                    if callback:
-                        # Handle arguments if needed by specific commands
-                        if command == "!game":
-                            parts = message.content.strip().split(" ", 1)
-                            if len(parts) > 1:
-                                game_name = parts[1]
-                                await callback(ctx, self.bot, game_name)
-                            else:
-                                await ctx.send("Please specify a game name.")
-                        elif command == "!addcommand":
-                            # Example argument handling for addcommand:
-                            # !addcommand <command> <response> <aliases...>
-                            parts = message.content.strip().split(" ", 3)
-                            if len(parts) < 3:
-                                await ctx.send("Usage: !addcommand <command> <response> [aliases]")
-                            else:
-                                # parts[1]: command
-                                # parts[2]: response
-                                # parts[3]: aliases (optional)
-                                cmd_name = parts[1]
-                                cmd_response = parts[2]
-                                aliases = parts[3].split() if len(parts) > 3 else []
-                                await callback(ctx, self.bot, cmd_name, cmd_response, aliases)
-                        else:
-                            # No extra args needed
-                            await callback(ctx, self.bot)
-                    else:
-                        # No callback, just send the response if available
-                        if details.get("response"):
-                            await ctx.send(details["response"])
+                    ctx = Ctx(message, self.bot, details, user_roles)
+
+                    try:
+                        await self.invoke(command, details, callback, ctx, message)
+                    except ExecutorBusy:
+                        await ctx.send("I'm a bit busy right now, please try again in a moment.")
+                    except asyncio.TimeoutError:
+                        await ctx.send("That took too long, so I gave up on it.")
+                    except concurrent.futures.BrokenExecutor:
+                        # Another job timed out and its workers were replaced under this one.
+                        await ctx.send("Something went wrong there, please try again.")
                 else:
                     await message.channel.send("You do not have permission to use this command.")
                 return  # Stop after handling the first matching command
 
+        if trigger.startswith("!"):
+            await self.suggest_command(message, trigger)
+
+    async def invoke(self, command, details, callback, ctx, message):
+        """Run a matched command: its callback if it has one, else its response."""
+        if callback:
+            # Handle arguments if needed by specific commands
+            if command == "!game":
+                parts = message.content.strip().split(" ", 1)
+                if len(parts) > 1:
+                    game_name = parts[1]
+                    await callback(ctx, self.bot, game_name)
+                else:
+                    await ctx.send("Please specify a game name.")
+            elif command == "!addcommand":
+                # !addcommand <command>[,<alias>...] <response...>
+                # The response is the rest of the line, so it can contain
+                # spaces and template variables like $(random a|b|c).
+                parts = message.content.strip().split(" ", 2)
+                if len(parts) < 3 or not parts[2].strip():
+                    await ctx.send("Usage: !addcommand <command>[,<alias>...] <response>")
+                else:
+                    names = [name for name in parts[1].split(",") if name]
+                    cmd_name = names[0] if names else parts[1]
+                    cmd_response = parts[2].strip()
+                    aliases = names[1:]
+                    await callback(ctx, self.bot, cmd_name, cmd_response, aliases)
+            else:
+                # No extra args needed
+                await callback(ctx, self.bot)
+        else:
+            # No callback, just send the response if available
+            if details.get("response"):
+                template = details.get("template")
+                if template is None or template.source != details["response"]:
+                    # Entry was added or edited without going through compile
+                    template = details["template"] = self.templates.compile(details["response"])
+                await ctx.send(await self.templates.render(template, ctx, command))
+
 def setup(bot):
     if "CommandsPlugin" in bot.cogs:
         bot.remove_cog("CommandsPlugin")
@@ -0,0 +1,156 @@
+import time
+
+from snapshots import to_monotonic, to_wall_clock
+
+# Twitch drops chat messages longer than this.
+MAX_MESSAGE_LENGTH = 500
+
+
+def trigrams(word):
+    """
+    Trigrams of a trigger, padded so short ones like !d still get a few.
+    The "!" prefix is shared by every trigger, so it is left out.
+    """
+    padded = f"  {word.lstrip('!')} "
+    return {padded[i:i + 3] for i in range(len(padded) - 2)}
+
+
+class TriggerIndex:
+    """
+    Trigram index over command triggers and aliases for "did you mean" replies.
+
+    Each trigram maps to the triggers containing it, so a lookup only scores
+    triggers that share at least one trigram with the typo instead of
+    comparing it against every command.
+    """
+
+    def __init__(self, min_score=0.3):
+        self.min_score = min_score
+        self.postings = {}  # trigram -> set of triggers
+        self.triggers = {}  # trigger -> (command, level, trigram count)
+
+    def rebuild(self, custom_commands):
+        self.postings = {}
+        self.triggers = {}
+        for command, details in custom_commands.items():
+            self.add(command, details)
+
+    def add(self, command, details):
+        for trigger in [command] + details.get("aliases", []):
+            # Only the first word is ever matched against chat.
+            trigger = trigger.split(" ")[0].lower()
+            if trigger in self.triggers:
+                continue
+            grams = trigrams(trigger)
+            self.triggers[trigger] = (command, details.get("level", 0), len(grams))
+            for gram in grams:
+                self.postings.setdefault(gram, set()).add(trigger)
+
+    def remove(self, trigger):
+        trigger = trigger.lower()
+        if self.triggers.pop(trigger, None) is None:
+            return
+        for gram in trigrams(trigger):
+            entries = self.postings.get(gram)
+            if entries:
+                entries.discard(trigger)
+                if not entries:
+                    del self.postings[gram]
+
+    def suggest(self, word, user_level, limit=3):
+        """Return up to `limit` triggers similar to `word` that the user may use, best first."""
+        grams = trigrams(word.lower())
+        shared = {}
+        for gram in grams:
+            for trigger in self.postings.get(gram, ()):
+                shared[trigger] = shared.get(trigger, 0) + 1
+
+        scored = []
+        for trigger, count in shared.items():
+            command, level, size = self.triggers[trigger]
+            if level > user_level:
+                continue
+            # Jaccard similarity of the two trigram sets
+            score = count / (len(grams) + size - count)
+            if score >= self.min_score:
+                scored.append((score, trigger))
+
+        scored.sort(key=lambda item: (-item[0], item[1]))
+        return [trigger for _, trigger in scored[:limit]]
+
+
+class SuggestionLimiter:
+    """Allows at most one suggestion per user per `window` seconds."""
+
+    def __init__(self, window=60):
+        self.window = window
+        self.last_sent = {}
+
+    def allow(self, user):
+        now = time.monotonic()
+        last = self.last_sent.get(user)
+        if last is not None and now - last < self.window:
+            return False
+
+        # Forget users whose window has passed, so the table stays small.
+        if len(self.last_sent) > 1000:
+            self.last_sent = {u: t for u, t in self.last_sent.items() if now - t < self.window}
+
+        self.last_sent[user] = now
+        return True
+
+    def dump_state(self):
+        now = time.monotonic()
+        return {user: to_wall_clock(sent) for user, sent in self.last_sent.items() if now - sent < self.window}
+
+    def restore_state(self, last_sent):
+        for user, sent in last_sent.items():
+            self.last_sent[user] = to_monotonic(sent)
+
+
+class CommandListing:
+    """
+    The !commands reply, built once per permission level and split into
+    pages that fit in a chat message. Call invalidate() when commands change.
+    """
+
+    # Room left on each page for the "(page x/y, ...)" footer.
+    FOOTER_RESERVE = 40
+
+    def __init__(self, levels):
+        self.levels = sorted(levels)
+        self.pages = None
+
+    def invalidate(self):
+        self.pages = None
+
+    def get_pages(self, custom_commands, user_level):
+        if self.pages is None:
+            self.pages = {level: self.build_pages(custom_commands, level) for level in self.levels}
+        if user_level not in self.pages:
+            self.pages[user_level] = self.build_pages(custom_commands, user_level)
+        return self.pages[user_level]
+
+    def build_pages(self, custom_commands, user_level):
+        available_commands = []
+        for command, details in custom_commands.items():
+            if details["level"] <= user_level:
+                available_commands.append(command)
+                available_commands.extend(details.get("aliases", []))
+
+        if "!commands" not in available_commands:
+            available_commands.append("!commands")
+
+        limit = MAX_MESSAGE_LENGTH - self.FOOTER_RESERVE
+        pages = []
+        current = ""
+        for command in available_commands:
+            candidate = f"{current}, {command}" if current else command
+            if len(candidate) > limit and current:
+                pages.append(current)
+                current = command
+            else:
+                current = candidate
+        if current:
+            pages.append(current)
+        return pages
@@ -1,8 +1,7 @@
 async def add_command_callback(ctx, bot, cmd_name, cmd_response, aliases):
     plugin = bot.cogs["CommandsPlugin"]
-    user_level = plugin.get_user_level(ctx.author)
 
-    if user_level < 1:
+    if not ctx.roles.at_least("moderator"):
         await ctx.send("You do not have permission to add commands.")
         return
 
@@ -10,17 +9,18 @@ async def add_command_callback(ctx, bot, cmd_name, cmd_response, aliases):
         await ctx.send(f"The command '{cmd_name}' already exists.")
         return
 
-    plugin.CUSTOM_COMMANDS[cmd_name] = {
+    plugin.add_command(cmd_name, {
         "response": cmd_response,
-        "level": 0,
+        "template": plugin.templates.compile(cmd_response),
+        "level": "viewer",
         "aliases": aliases
-    }
+    })
     await ctx.send(f"Command '{cmd_name}' has been added successfully.")
 
 COMMAND_DEFINITION = {
     "!addcommand": {
         "response": None,
-        "level": 1,
+        "level": "moderator",
         "aliases": [],
         "callback": add_command_callback
     }
@@ -1,22 +1,24 @@
 async def list_commands_callback(ctx, bot):
     plugin = bot.cogs["CommandsPlugin"]
-    user_level = plugin.get_user_level(ctx.author)
-    available_commands = []
 
-    for command, details in plugin.CUSTOM_COMMANDS.items():
-        if details["level"] <= user_level:
-            available_commands.append(command)
-            available_commands.extend(details.get("aliases", []))
+    # Pages are built once per permission level and reused until commands change.
+    pages = plugin.command_listing.get_pages(plugin.CUSTOM_COMMANDS, ctx.user_level)
 
-    if "!commands" not in available_commands:
-        available_commands.append("!commands")
+    # Optional page number: !commands 2
+    parts = ctx.message.content.strip().split()
+    page = 1
+    if len(parts) > 1 and parts[1].isdigit():
+        page = min(max(int(parts[1]), 1), len(pages))
 
-    await ctx.send(", ".join(available_commands))
+    if len(pages) == 1:
+        await ctx.send(pages[0])
+    else:
+        await ctx.send(f"{pages[page - 1]} (page {page}/{len(pages)}, use !commands <page>)")
 
 COMMAND_DEFINITION = {
     "!commands": {
         "response": None,
-        "level": 0,
+        "level": "viewer",
         "aliases": [],
         "callback": list_commands_callback
     }
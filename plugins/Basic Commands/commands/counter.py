@@ -0,0 +1,52 @@
+import re
+
+USAGE = "Usage: !counter <name> [+|-|+<n>|-<n>|=<n>]"
+
+COUNTER_NAME = re.compile(r"^[a-z0-9_]{1,32}$")
+CHANGE = re.compile(r"^([+\-=])(\d*)$")
+
+async def counter_callback(ctx, bot):
+    store = bot.cogs["CommandsPlugin"].quotes
+
+    # Expected formats:
+    # !counter deaths
+    # !counter deaths +
+    # !counter deaths -2
+    # !counter deaths =0
+    parts = ctx.message.content.strip().split()
+    if len(parts) not in (2, 3) or not COUNTER_NAME.match(parts[1].lower()):
+        await ctx.send(USAGE)
+        return
+
+    name = parts[1].lower()
+    if len(parts) == 2:
+        await ctx.send(f"{name}: {await store.get_counter(name)}")
+        return
+
+    change = CHANGE.match(parts[2])
+    if not change:
+        await ctx.send(USAGE)
+        return
+    if not ctx.roles.at_least("moderator"):
+        await ctx.send("You do not have permission to change counters.")
+        return
+
+    op, amount = change.group(1), change.group(2)
+    if op == "=":
+        if not amount:
+            await ctx.send(USAGE)
+            return
+        value = await store.set_counter(name, int(amount))
+    else:
+        amount = int(amount) if amount else 1
+        value = await store.add_to_counter(name, amount if op == "+" else -amount)
+    await ctx.send(f"{name}: {value}")
+
+COMMAND_DEFINITION = {
+    "!counter": {
+        "response": None,
+        "level": "viewer",
+        "aliases": [],
+        "callback": counter_callback
+    }
+}
@@ -1,8 +1,23 @@
 import random
 
+# Above this many dice only the total is reported, it wouldn't fit in chat anyway.
+MAX_SHOWN_ROLLS = 50
+
+# Keeps every roll well within the executor timeout.
+MAX_DICE = 10000
+
+def roll_dice(sides, count):
+    """
+    Pure dice roll, run in the process executor so huge rolls don't block chat.
+    Returns (rolls, total); rolls is empty when there are too many to show.
+    """
+    if count <= MAX_SHOWN_ROLLS:
+        rolls = [random.randint(1, sides) for _ in range(count)]
+        return rolls, sum(rolls)
+    total = sum(random.randint(1, sides) for _ in range(count))
+    return [], total
+
 async def roll_dice_callback(ctx, bot):
-    plugin = bot.cogs["CommandsPlugin"]
-    user_level = plugin.get_user_level(ctx.author)
     # No permission check needed, everyone can roll dice.
     
     # Expected formats:
@@ -35,11 +50,15 @@ async def roll_dice_callback(ctx, bot):
         if count < 1:
             await ctx.send("Number of dice rolled must be at least 1.")
             return
+        if count > MAX_DICE:
+            await ctx.send(f"You can roll at most {MAX_DICE} dice at once.")
+            return
     
-    rolls = [random.randint(1, sides) for _ in range(count)]
-    total = sum(rolls)
+    rolls, total = await ctx.compute(roll_dice, sides, count)
     if count == 1:
         await ctx.send(f"You rolled a {rolls[0]} on a {sides}-sided die.")
+    elif not rolls:
+        await ctx.send(f"You rolled {count}d{sides}. Total: {total}")
     else:
         rolls_str = ", ".join(map(str, rolls))
         await ctx.send(f"You rolled {count}d{sides}: {rolls_str}. Total: {total}")
@@ -51,19 +70,21 @@ async def dice_help_callback(ctx, bot):
         "`!d 6` rolls one six-sided die.\n"
         "`!d 6 4` rolls four six-sided dice and sums them.\n"
         "`!d 20 2` rolls two twenty-sided dice and sums them.\n"
-        "You can use any positive number as sides or count!"
+        f"You can use any positive number of sides and up to {MAX_DICE} dice!"
     )
 
 COMMAND_DEFINITION = {
     "!d": {
         "response": None,
-        "level": 0,  # Everyone can use it
+        "level": "viewer",  # Everyone can use it
         "aliases": [],
-        "callback": roll_dice_callback
+        "callback": roll_dice_callback,
+        "executor": "process",  # Large rolls are CPU-bound
+        "timeout": 5
     },
     "!dice": {
         "response": None,
-        "level": 0,
+        "level": "viewer",
         "aliases": [],
         "callback": dice_help_callback
     }
@@ -0,0 +1,47 @@
+async def grant_role_callback(ctx, bot):
+    plugin = bot.cogs["CommandsPlugin"]
+
+    # Expected format: !grant <user> <role>
+    parts = ctx.message.content.strip().split()
+    if len(parts) < 3:
+        await ctx.send("Usage: !grant <user> <role>")
+        return
+
+    login = parts[1].lstrip("@").lower()
+    role = parts[2].lower()
+    grantable = [name for name in plugin.roles.levels if name not in ("viewer", "broadcaster")]
+    if role not in grantable:
+        await ctx.send(f"Unknown role '{role}'. Roles that can be granted: {', '.join(grantable)}")
+        return
+
+    plugin.roles.grant(login, role)
+    await ctx.send(f"{login} has been granted the {role} role.")
+
+async def revoke_role_callback(ctx, bot):
+    plugin = bot.cogs["CommandsPlugin"]
+
+    parts = ctx.message.content.strip().split()
+    if len(parts) < 2:
+        await ctx.send("Usage: !revoke <user>")
+        return
+
+    login = parts[1].lstrip("@").lower()
+    if plugin.roles.revoke(login):
+        await ctx.send(f"Removed the granted role from {login}.")
+    else:
+        await ctx.send(f"{login} has no granted role.")
+
+COMMAND_DEFINITION = {
+    "!grant": {
+        "response": None,
+        "level": "broadcaster",
+        "aliases": [],
+        "callback": grant_role_callback
+    },
+    "!revoke": {
+        "response": None,
+        "level": "broadcaster",
+        "aliases": [],
+        "callback": revoke_role_callback
+    }
+}
@@ -1,7 +1,7 @@
 COMMAND_DEFINITION = {
     "!greet": {
         "response": "Hello there! How can I assist you today?",
-        "level": 0,
+        "level": "viewer",
         "aliases": ["!hello", "!hi"]
     }
 }
@@ -1,7 +1,7 @@
 COMMAND_DEFINITION = {
     "!help": {
         "response": "Check out all available commands with !commands",
-        "level": 0,
+        "level": "viewer",
         "aliases": []
     }
 }
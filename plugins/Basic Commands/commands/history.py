@@ -0,0 +1,72 @@
+import time
+
+MAX_HISTORY = 10
+MAX_MESSAGE_LENGTH = 500
+
+def format_age(timestamp):
+    seconds = max(int(time.time() - timestamp), 0)
+    days, remainder = divmod(seconds, 86400)
+    hours, remainder = divmod(remainder, 3600)
+    minutes = remainder // 60
+    if days:
+        return f"{days}d {hours}h ago"
+    if hours:
+        return f"{hours}h {minutes}m ago"
+    if minutes:
+        return f"{minutes}m ago"
+    return f"{seconds}s ago"
+
+async def last_seen_callback(ctx, bot):
+    parts = ctx.message.content.strip().split()
+    if len(parts) < 2:
+        await ctx.send("Usage: !lastseen <user>")
+        return
+
+    login = parts[1].lstrip("@").lower()
+    seen = bot.history.seen(login)
+    if seen is None:
+        await ctx.send(f"I haven't seen {login} chat.")
+        return
+
+    timestamp, channel = seen
+    where = "" if channel == ctx.channel.name else f" in #{channel}"
+    await ctx.send(f"{login} was last seen {format_age(timestamp)}{where}.")
+
+async def history_callback(ctx, bot):
+    # Expected formats:
+    # !history someone
+    # !history someone 5
+    parts = ctx.message.content.strip().split()
+    if len(parts) < 2 or (len(parts) > 2 and not parts[2].isdigit()):
+        await ctx.send(f"Usage: !history <user> [count, up to {MAX_HISTORY}]")
+        return
+
+    login = parts[1].lstrip("@").lower()
+    count = min(max(int(parts[2]), 1), MAX_HISTORY) if len(parts) > 2 else 3
+    messages = await bot.history.history(ctx.channel.name, login, count)
+    if not messages:
+        await ctx.send(f"No recent messages from {login}.")
+        return
+
+    # Oldest first reads naturally; drop the oldest ones if it doesn't fit.
+    lines = [f"[{format_age(timestamp)}] {text}" for timestamp, text in reversed(messages)]
+    response = f"{login}: " + " | ".join(lines)
+    while len(response) > MAX_MESSAGE_LENGTH and len(lines) > 1:
+        lines.pop(0)
+        response = f"{login}: " + " | ".join(lines)
+    await ctx.send(response[:MAX_MESSAGE_LENGTH])
+
+COMMAND_DEFINITION = {
+    "!lastseen": {
+        "response": None,
+        "level": "moderator",
+        "aliases": [],
+        "callback": last_seen_callback
+    },
+    "!history": {
+        "response": None,
+        "level": "moderator",
+        "aliases": [],
+        "callback": history_callback
+    }
+}
@@ -1,7 +1,7 @@
 COMMAND_DEFINITION = {
     "!info": {
         "response": "I am TanukiTechBot, here to help manage your chat and entertain your audience!",
-        "level": 0,
+        "level": "viewer",
         "aliases": []
     }
 }
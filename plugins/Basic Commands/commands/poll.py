@@ -1,10 +1,7 @@
-import aiohttp
 import json
 
 async def create_poll_callback(ctx, bot):
-    plugin = bot.cogs["CommandsPlugin"]
-    user_level = plugin.get_user_level(ctx.author)
-    if user_level < 1:  # moderators or broadcaster
+    if not ctx.roles.at_least("moderator"):
         await ctx.send("You do not have permission to create polls.")
         return
 
@@ -39,28 +36,18 @@ async def create_poll_callback(ctx, bot):
         await ctx.send("You must provide between 2 to 5 options.")
         return
 
-    oauth_data = bot.oauth_data
-    oauth_token = oauth_data.get("oauth_token")
-    broadcaster_id = oauth_data.get("broadcaster_id")
-    client_id = oauth_data.get("client_id")
-
-    if not all([oauth_token, broadcaster_id, client_id]):
+    broadcaster_id = bot.oauth_data.get("broadcaster_id")
+    if not broadcaster_id:
         await ctx.send("Missing OAuth configuration. Cannot create poll.")
         return
 
-    success = await create_poll(broadcaster_id, title, choices, duration, oauth_token, client_id)
+    success = await create_poll(bot.helix, broadcaster_id, title, choices, duration)
     if success:
         await ctx.send(f"Poll created: {title}")
     else:
         await ctx.send("Failed to create the poll. Check logs and token scopes.")
 
-async def create_poll(broadcaster_id, title, choices, duration, oauth_token, client_id):
-    url = "https://api.twitch.tv/helix/polls"
-    headers = {
-        "Authorization": f"Bearer {oauth_token}",
-        "Client-Id": client_id,
-        "Content-Type": "application/json"
-    }
+async def create_poll(helix, broadcaster_id, title, choices, duration):
     payload = {
         "broadcaster_id": broadcaster_id,
         "title": title,
@@ -68,22 +55,20 @@ async def create_poll(broadcaster_id, title, choices, duration, oauth_token, cli
         "duration": duration
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.post(url, headers=headers, json=payload) as response:
-            if response.status == 200:
-                data = await response.json()
-                # If we want, we can inspect `data` for poll info
-                return True
-            else:
-                error_text = await response.text()
-                print(f"Failed to create poll: {response.status} - {error_text}")
-                return False
+    status, data = await helix.request("POST", "polls", json=payload)
+    if status == 200:
+        # If we want, we can inspect `data` for poll info
+        return True
+    else:
+        print(f"Failed to create poll: {status} - {data}")
+        return False
 
 COMMAND_DEFINITION = {
     "!poll": {
         "response": None,
-        "level": 1,  # moderator or above
+        "level": "moderator",  # moderator or above
         "aliases": [],
-        "callback": create_poll_callback
+        "callback": create_poll_callback,
+        "scopes": ["channel:manage:polls"]
     }
 }
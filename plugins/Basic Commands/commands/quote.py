@@ -0,0 +1,61 @@
+import time
+
+USAGE = "Usage: !quote [number] | !quote search <text> | !quote add <text> | !quote remove <number>"
+
+def format_quote(quote):
+    added = time.strftime("%Y-%m-%d", time.localtime(quote["added_at"])) if quote["added_at"] else "unknown date"
+    return f"Quote #{quote['id']}: {quote['text']} ({added})"
+
+async def quote_callback(ctx, bot):
+    store = bot.cogs["CommandsPlugin"].quotes
+
+    # Expected formats:
+    # !quote
+    # !quote 42
+    # !quote search pizza
+    # !quote add "I never miss" - the streamer, five seconds before missing
+    # !quote remove 42
+    parts = ctx.message.content.strip().split(" ", 2)
+    if len(parts) == 1:
+        quote = await store.random_quote()
+        await ctx.send(format_quote(quote) if quote else "There are no quotes yet.")
+        return
+
+    action = parts[1].lower()
+    if action.lstrip("#").isdigit():
+        number = int(action.lstrip("#"))
+        quote = await store.get_quote(number)
+        await ctx.send(format_quote(quote) if quote else f"There is no quote #{number}.")
+
+    elif action == "search" and len(parts) == 3:
+        results = await store.search(parts[2])
+        await ctx.send(format_quote(results[0]) if results else f"No quote matches '{parts[2]}'.")
+
+    elif action == "add" and len(parts) == 3:
+        if not ctx.roles.at_least("moderator"):
+            await ctx.send("You do not have permission to add quotes.")
+            return
+        number = await store.add_quote(parts[2], ctx.author.name)
+        await ctx.send(f"Added quote #{number}.")
+
+    elif action in ("remove", "delete") and len(parts) == 3 and parts[2].lstrip("#").isdigit():
+        if not ctx.roles.at_least("moderator"):
+            await ctx.send("You do not have permission to remove quotes.")
+            return
+        number = int(parts[2].lstrip("#"))
+        if await store.delete_quote(number):
+            await ctx.send(f"Removed quote #{number}.")
+        else:
+            await ctx.send(f"There is no quote #{number}.")
+
+    else:
+        await ctx.send(USAGE)
+
+COMMAND_DEFINITION = {
+    "!quote": {
+        "response": None,
+        "level": "viewer",
+        "aliases": ["!quotes"],
+        "callback": quote_callback
+    }
+}
@@ -0,0 +1,45 @@
+async def shoutout_callback(ctx, bot):
+    plugin = bot.cogs["CommandsPlugin"]
+
+    # Expected format: !so <username> [custom message]
+    parts = ctx.message.content.strip().split(" ", 2)
+    if len(parts) < 2 or not parts[1].strip("@"):
+        await ctx.send("Usage: !so <username> [message]")
+        return
+
+    login = parts[1].lstrip("@").lower()
+    user = await plugin.lookups.get_user(login)
+    if user is None:
+        await ctx.send(f"Could not find a Twitch user named '{login}'.")
+        return
+
+    channel = await plugin.lookups.get_channel(user["id"])
+    game = channel.get("game_name") if channel else None
+    response = f"Go check out {user['display_name']} at https://twitch.tv/{user['login']}"
+    response += f" - they were last playing {game}!" if game else "!"
+    if len(parts) == 3:
+        response += f" {parts[2]}"
+    await ctx.send(response)
+
+    broadcaster_id = bot.oauth_data.get("broadcaster_id")
+    if not broadcaster_id or user["id"] == broadcaster_id:
+        return
+    # The chat shoutout works without the scope; only the native one needs it.
+    if bot.tokens.missing_scopes({plugin.shoutouts.scope}):
+        return
+
+    result, seconds = plugin.shoutouts.enqueue(broadcaster_id, user["id"], user["display_name"])
+    if result == "queued" and seconds > 0:
+        minutes, seconds = divmod(seconds, 60)
+        await ctx.send(f"Twitch shoutout for {user['display_name']} queued, going out in {minutes}m {seconds}s.")
+    elif result == "recent":
+        await ctx.send(f"{user['display_name']} already got a Twitch shoutout this hour.")
+
+COMMAND_DEFINITION = {
+    "!so": {
+        "response": None,
+        "level": "moderator",
+        "aliases": ["!shoutout"],
+        "callback": shoutout_callback
+    }
+}
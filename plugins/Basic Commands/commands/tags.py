@@ -1,8 +1,4 @@
-import aiohttp
-
 async def list_tags_callback(ctx, bot):
-    plugin = bot.cogs["CommandsPlugin"]
-    user_level = plugin.get_user_level(ctx.author)
     # Anyone can see the current tags
     tags = await fetch_current_tags(bot)
     if tags is None:
@@ -15,9 +11,7 @@ async def list_tags_callback(ctx, bot):
         await ctx.send("No tags currently set.")
 
 async def add_tag_callback(ctx, bot):
-    plugin = bot.cogs["CommandsPlugin"]
-    user_level = plugin.get_user_level(ctx.author)
-    if user_level < 1:
+    if not ctx.roles.at_least("moderator"):
         await ctx.send("You do not have permission to modify tags.")
         return
 
@@ -44,9 +38,7 @@ async def add_tag_callback(ctx, bot):
         await ctx.send("Failed to update tags. Check logs and scopes.")
 
 async def remove_tag_callback(ctx, bot):
-    plugin = bot.cogs["CommandsPlugin"]
-    user_level = plugin.get_user_level(ctx.author)
-    if user_level < 1:
+    if not ctx.roles.at_least("moderator"):
         await ctx.send("You do not have permission to modify tags.")
         return
 
@@ -73,77 +65,55 @@ async def remove_tag_callback(ctx, bot):
         await ctx.send("Failed to update tags.")
 
 async def fetch_current_tags(bot):
-    oauth_data = bot.oauth_data
-    oauth_token = oauth_data.get("oauth_token")
-    broadcaster_id = oauth_data.get("broadcaster_id")
-    client_id = oauth_data.get("client_id")
-
-    if not all([oauth_token, broadcaster_id, client_id]):
+    broadcaster_id = bot.oauth_data.get("broadcaster_id")
+    if not broadcaster_id:
         print("Missing OAuth configuration for tags.")
         return None
 
-    url = f"https://api.twitch.tv/helix/channels?broadcaster_id={broadcaster_id}"
-    headers = {
-        "Authorization": f"Bearer {oauth_token}",
-        "Client-Id": client_id
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                if "data" in data and data["data"]:
-                    return data["data"][0].get("tag_ids", [])
-            else:
-                print(f"Failed to fetch current tags: {response.status} - {await response.text()}")
-                return None
+    status, data = await bot.helix.request("GET", "channels", params={"broadcaster_id": broadcaster_id})
+    if status == 200:
+        if "data" in data and data["data"]:
+            return data["data"][0].get("tag_ids", [])
+    else:
+        print(f"Failed to fetch current tags: {status} - {data}")
+        return None
 
 async def update_tags(bot, tags):
-    oauth_data = bot.oauth_data
-    oauth_token = oauth_data.get("oauth_token")
-    broadcaster_id = oauth_data.get("broadcaster_id")
-    client_id = oauth_data.get("client_id")
-
-    if not all([oauth_token, broadcaster_id, client_id]):
+    broadcaster_id = bot.oauth_data.get("broadcaster_id")
+    if not broadcaster_id:
         print("Missing OAuth configuration for tag updates.")
         return False
 
-    url = "https://api.twitch.tv/helix/channels"
-    headers = {
-        "Authorization": f"Bearer {oauth_token}",
-        "Client-Id": client_id,
-        "Content-Type": "application/json"
-    }
     payload = {
-        "broadcaster_id": broadcaster_id,
         "tag_ids": tags
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.patch(url, headers=headers, json=payload) as response:
-            if response.status == 204:
-                return True
-            else:
-                print(f"Failed to update tags: {response.status} - {await response.text()}")
-                return False
+    status, data = await bot.helix.request("PATCH", "channels", params={"broadcaster_id": broadcaster_id}, json=payload)
+    if status == 204:
+        return True
+    else:
+        print(f"Failed to update tags: {status} - {data}")
+        return False
 
 COMMAND_DEFINITION = {
     "!tags": {
         "response": None,
-        "level": 0,
+        "level": "viewer",
         "aliases": [],
         "callback": list_tags_callback  # Changed from list_commands_callback to list_tags_callback
     },
     "!tags add": {
         "response": None,
-        "level": 1,
+        "level": "moderator",
         "aliases": [],
-        "callback": add_tag_callback
+        "callback": add_tag_callback,
+        "scopes": ["channel:manage:broadcast"]
     },
     "!tags remove": {
         "response": None,
-        "level": 1,
+        "level": "moderator",
         "aliases": [],
-        "callback": remove_tag_callback
+        "callback": remove_tag_callback,
+        "scopes": ["channel:manage:broadcast"]
     }
 }
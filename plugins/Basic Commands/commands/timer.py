@@ -0,0 +1,59 @@
+USAGE = "Usage: !timer add <name> <minutes> <min_chat_lines> <message> | !timer remove <name> | !timer list"
+
+async def timer_callback(ctx, bot):
+    plugin = bot.cogs["CommandsPlugin"]
+
+    # Expected formats:
+    # !timer add socials 15 10 Follow me on ...
+    # !timer remove socials
+    # !timer list
+    parts = ctx.message.content.strip().split(" ", 5)
+    if len(parts) < 2:
+        await ctx.send(USAGE)
+        return
+
+    action = parts[1].lower()
+    if action == "list":
+        channel_timers = plugin.timers.channel_timers(ctx.channel.name)
+        if not channel_timers:
+            await ctx.send("No timers are set.")
+            return
+        listing = [
+            f"{name} (every {timer['interval']}m, {timer['min_lines']} lines)"
+            for name, timer in channel_timers.items()
+        ]
+        await ctx.send("Timers: " + ", ".join(listing))
+
+    elif action == "remove" and len(parts) >= 3:
+        name = parts[2].lower()
+        if plugin.timers.remove(name, ctx.channel.name):
+            await ctx.send(f"Timer '{name}' removed.")
+        else:
+            await ctx.send(f"There is no timer named '{name}'.")
+
+    elif action == "add" and len(parts) == 6:
+        name = parts[2].lower()
+        if not parts[3].isdigit() or not parts[4].isdigit():
+            await ctx.send("Minutes and chat lines must be whole numbers.")
+            return
+
+        interval = int(parts[3])
+        min_lines = int(parts[4])
+        if interval < 1:
+            await ctx.send("Timers must run at most once a minute.")
+            return
+
+        plugin.timers.add(name, ctx.channel.name, interval, min_lines, parts[5])
+        await ctx.send(f"Timer '{name}' will post every {interval} minutes (after at least {min_lines} chat lines).")
+
+    else:
+        await ctx.send(USAGE)
+
+COMMAND_DEFINITION = {
+    "!timer": {
+        "response": None,
+        "level": "moderator",
+        "aliases": ["!timers"],
+        "callback": timer_callback
+    }
+}
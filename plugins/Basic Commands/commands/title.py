@@ -1,10 +1,6 @@
-import aiohttp
-
 async def change_title_callback(ctx, bot):
-    plugin = bot.cogs["CommandsPlugin"]
-    user_level = plugin.get_user_level(ctx.author)
 
-    if user_level < 1:  # moderator or above
+    if not ctx.roles.at_least("moderator"):
         await ctx.send("You do not have permission to change the title.")
         return
 
@@ -16,46 +12,35 @@ async def change_title_callback(ctx, bot):
 
     new_title = parts[1]
 
-    oauth_data = bot.oauth_data
-    oauth_token = oauth_data.get("oauth_token")
-    broadcaster_id = oauth_data.get("broadcaster_id")
-    client_id = oauth_data.get("client_id")
-
-    if not all([oauth_token, broadcaster_id, client_id]):
+    broadcaster_id = bot.oauth_data.get("broadcaster_id")
+    if not broadcaster_id:
         await ctx.send("Missing OAuth configuration. Cannot change title.")
         return
 
-    success = await update_title(broadcaster_id, new_title, oauth_token, client_id)
+    success = await update_title(bot.helix, broadcaster_id, new_title)
     if success:
         await ctx.send(f"Title changed to: {new_title}")
     else:
         await ctx.send("Failed to update the title. Check logs and scopes.")
 
-async def update_title(broadcaster_id, new_title, oauth_token, client_id):
-    url = "https://api.twitch.tv/helix/channels"
-    headers = {
-        "Authorization": f"Bearer {oauth_token}",
-        "Client-Id": client_id,
-        "Content-Type": "application/json"
-    }
+async def update_title(helix, broadcaster_id, new_title):
     payload = {
-        "broadcaster_id": broadcaster_id,
         "title": new_title
     }
 
-    async with aiohttp.ClientSession() as session:
-        async with session.patch(url, headers=headers, json=payload) as response:
-            if response.status == 204:
-                return True
-            else:
-                print(f"Failed to update title: {response.status} - {await response.text()}")
-                return False
+    status, data = await helix.request("PATCH", "channels", params={"broadcaster_id": broadcaster_id}, json=payload)
+    if status == 204:
+        return True
+    else:
+        print(f"Failed to update title: {status} - {data}")
+        return False
 
 COMMAND_DEFINITION = {
     "!title": {
         "response": None,
-        "level": 1,  # Moderator or above
+        "level": "moderator",  # Moderator or above
         "aliases": [],
-        "callback": change_title_callback
+        "callback": change_title_callback,
+        "scopes": ["channel:manage:broadcast"]
     }
 }
@@ -1,15 +1,12 @@
-import aiohttp
 import random
 
 # Seed the random number generator for good measure (usually not needed)
 random.seed()
 
 async def pick_winner_callback(ctx, bot):
-    plugin = bot.cogs["CommandsPlugin"]
-    user_level = plugin.get_user_level(ctx.author)
 
     # Require at least a moderator to run this command
-    if user_level < 1:
+    if not ctx.roles.at_least("moderator"):
         await ctx.send("You do not have permission to pick a winner.")
         return
 
@@ -41,12 +38,9 @@ async def pick_winner_callback(ctx, bot):
 async def fetch_chatters_helix(bot):
     """Fetch chatters using the Helix API endpoint.
        Requires `moderator:read:chatters` scope and a valid moderator_id."""
-    oauth_data = bot.oauth_data
-    oauth_token = oauth_data.get("oauth_token")
-    client_id = oauth_data.get("client_id")
-    broadcaster_id = oauth_data.get("broadcaster_id")
+    broadcaster_id = bot.oauth_data.get("broadcaster_id")
 
-    if not all([oauth_token, client_id, broadcaster_id]):
+    if not broadcaster_id:
         print("Missing OAuth configuration for fetching chatters.")
         return None
 
@@ -54,30 +48,23 @@ async def fetch_chatters_helix(bot):
     # Otherwise, provide a known moderator's user ID here.
     moderator_id = broadcaster_id
 
-    url = f"https://api.twitch.tv/helix/chat/chatters?broadcaster_id={broadcaster_id}&moderator_id={moderator_id}"
-    headers = {
-        "Authorization": f"Bearer {oauth_token}",
-        "Client-Id": client_id
-    }
-
-    async with aiohttp.ClientSession() as session:
-        async with session.get(url, headers=headers) as response:
-            if response.status == 200:
-                data = await response.json()
-                # Extract user_names from the returned data
-                chatters = [chatter["user_name"] for chatter in data.get("data", [])]
-                return chatters
-            else:
-                # Log the error for debugging
-                error_text = await response.text()
-                print(f"Failed to fetch chatters (Status: {response.status}): {error_text}")
-                return None
+    params = {"broadcaster_id": broadcaster_id, "moderator_id": moderator_id}
+    status, data = await bot.helix.request("GET", "chat/chatters", params=params)
+    if status == 200:
+        # Extract user_names from the returned data
+        chatters = [chatter["user_name"] for chatter in data.get("data", [])]
+        return chatters
+    else:
+        # Log the error for debugging
+        print(f"Failed to fetch chatters (Status: {status}): {data}")
+        return None
 
 COMMAND_DEFINITION = {
     "!winner": {
         "response": None,
-        "level": 1,  # Moderators or above
+        "level": "moderator",  # Moderators or above
         "aliases": [],
-        "callback": pick_winner_callback
+        "callback": pick_winner_callback,
+        "scopes": ["moderator:read:chatters"]
     }
 }
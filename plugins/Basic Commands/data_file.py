@@ -0,0 +1,34 @@
+import json
+import os
+
+
+def read_data_file(path):
+    """Read the plugin's JSON data file. A missing or empty file reads as {}."""
+    if not os.path.isfile(path):
+        return {}
+    try:
+        with open(path, "r") as f:
+            raw = f.read()
+        return json.loads(raw) if raw.strip() else {}
+    except (OSError, json.JSONDecodeError) as e:
+        print(f"WARNING: Could not read '{path}': {e}")
+        return {}
+
+def update_data_file(path, key, value):
+    """
+    Replace one top-level key of the data file, keeping the others.
+    The file is written to a temp file first so a crash can't truncate it.
+    Returns True on success.
+    """
+    data = read_data_file(path)
+    data[key] = value
+
+    tmp_path = path + ".tmp"
+    try:
+        with open(tmp_path, "w") as f:
+            json.dump(data, f, indent=4)
+        os.replace(tmp_path, path)
+        return True
+    except OSError as e:
+        print(f"Failed to write '{path}': {e}")
+        return False
@@ -0,0 +1,139 @@
+import asyncio
+import time
+from collections import OrderedDict
+
+from snapshots import to_monotonic, to_wall_clock
+
+# Helix accepts up to 100 logins or ids per users/channels request.
+MAX_BATCH = 100
+
+
+class BatchedLookup:
+    """
+    Cached lookups that are sent to Helix in batches.
+
+    Keys requested within `window` seconds of each other are fetched with one
+    call of `fetch_many(keys)` per 100 keys, which returns ({key: value} for
+    the keys that exist, whether the request succeeded). Answers (including
+    "doesn't exist") are kept in an LRU table with a TTL, and a key already
+    being fetched is not requested twice. If a batch fails, its callers get
+    None.
+    """
+
+    def __init__(self, fetch_many, ttl=600, missing_ttl=60, window=0.05, max_entries=5000):
+        self.fetch_many = fetch_many
+        self.ttl = ttl
+        self.missing_ttl = missing_ttl
+        self.window = window
+        self.max_entries = max_entries
+        self.cache = OrderedDict()  # key -> (expires, value or None)
+        self.pending = {}           # key -> future, for keys in the next batch
+        self.inflight = {}          # key -> future, for keys in a request that hasn't answered yet
+        self._flush_handle = None
+
+    async def get(self, key):
+        entry = self.cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            self.cache.move_to_end(key)
+            return entry[1]
+
+        future = self.pending.get(key) or self.inflight.get(key)
+        if future is None:
+            future = self.pending[key] = asyncio.get_running_loop().create_future()
+            if self._flush_handle is None:
+                self._flush_handle = asyncio.get_running_loop().call_later(self.window, self._start_flush)
+        return await asyncio.shield(future)
+
+    def _start_flush(self):
+        self._flush_handle = None
+        batch, self.pending = self.pending, {}
+        self.inflight.update(batch)
+        keys = list(batch)
+        for start in range(0, len(keys), MAX_BATCH):
+            chunk = keys[start:start + MAX_BATCH]
+            asyncio.ensure_future(self._fetch({key: batch[key] for key in chunk}))
+
+    async def _fetch(self, futures):
+        try:
+            found, ok = await self.fetch_many(list(futures))
+        except Exception as e:
+            # Every caller in the batch is waiting on its future, whatever went wrong.
+            print(f"Helix lookup failed: {e}")
+            found, ok = {}, False
+
+        now = time.monotonic()
+        for key, future in futures.items():
+            value = found.get(key)
+            # Failed requests aren't cached; missing keys only briefly.
+            if ok:
+                self.cache[key] = (now + (self.ttl if value is not None else self.missing_ttl), value)
+                self.cache.move_to_end(key)
+            if self.inflight.get(key) is future:
+                del self.inflight[key]
+            if not future.done():
+                future.set_result(value)
+        while len(self.cache) > self.max_entries:
+            self.cache.popitem(last=False)
+
+    def close(self):
+        if self._flush_handle is not None:
+            self._flush_handle.cancel()
+            self._flush_handle = None
+        for future in list(self.pending.values()) + list(self.inflight.values()):
+            if not future.done():
+                future.cancel()
+        self.pending = {}
+        self.inflight = {}
+
+    def dump_state(self):
+        return [(key, to_wall_clock(expires), value) for key, (expires, value) in self.cache.items()]
+
+    def restore_state(self, entries):
+        now = time.monotonic()
+        for key, expires, value in entries:
+            expires = to_monotonic(expires)
+            if expires > now:
+                self.cache[key] = (expires, value)
+
+
+class HelixLookups:
+    """Users by login and channel info by broadcaster id, batched and cached."""
+
+    def __init__(self, bot, ttl=600):
+        self.bot = bot
+        self.users = BatchedLookup(self._fetch_users, ttl=ttl)
+        self.channels = BatchedLookup(self._fetch_channels, ttl=ttl)
+
+    async def get_user(self, login):
+        """{"id", "login", "display_name", ...} for a login, or None if there is no such user."""
+        return await self.users.get(login.lower())
+
+    async def get_channel(self, broadcaster_id):
+        """{"game_name", "title", ...} for a broadcaster id, or None."""
+        return await self.channels.get(broadcaster_id)
+
+    async def _fetch_users(self, logins):
+        status, data = await self.bot.helix.request("GET", "users", params=[("login", login) for login in logins])
+        if status != 200:
+            print(f"Failed to look up users: {status} - {data}")
+            return {}, False
+        return {user["login"]: user for user in data.get("data", [])}, True
+
+    async def _fetch_channels(self, broadcaster_ids):
+        params = [("broadcaster_id", broadcaster_id) for broadcaster_id in broadcaster_ids]
+        status, data = await self.bot.helix.request("GET", "channels", params=params)
+        if status != 200:
+            print(f"Failed to look up channels: {status} - {data}")
+            return {}, False
+        return {channel["broadcaster_id"]: channel for channel in data.get("data", [])}, True
+
+    def close(self):
+        self.users.close()
+        self.channels.close()
+
+    def dump_state(self):
+        return {"users": self.users.dump_state(), "channels": self.channels.dump_state()}
+
+    def restore_state(self, state):
+        self.users.restore_state(state.get("users", []))
+        self.channels.restore_state(state.get("channels", []))
@@ -0,0 +1,226 @@
+import asyncio
+import concurrent.futures
+import random
+import sqlite3
+import time
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS quotes (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    text TEXT NOT NULL,
+    added_by TEXT,
+    added_at REAL
+);
+CREATE TABLE IF NOT EXISTS counters (
+    name TEXT PRIMARY KEY,
+    value INTEGER NOT NULL
+);
+"""
+
+FTS_SCHEMA = """
+CREATE VIRTUAL TABLE IF NOT EXISTS quotes_fts USING fts5(text, content='quotes', content_rowid='id');
+CREATE TRIGGER IF NOT EXISTS quotes_ai AFTER INSERT ON quotes BEGIN
+    INSERT INTO quotes_fts(rowid, text) VALUES (new.id, new.text);
+END;
+CREATE TRIGGER IF NOT EXISTS quotes_ad AFTER DELETE ON quotes BEGIN
+    INSERT INTO quotes_fts(quotes_fts, rowid, text) VALUES ('delete', old.id, old.text);
+END;
+"""
+
+# Fixed statements, so sqlite3's statement cache prepares each one only once.
+INSERT_QUOTE = "INSERT INTO quotes (text, added_by, added_at) VALUES (?, ?, ?)"
+SELECT_QUOTE = "SELECT id, text, added_by, added_at FROM quotes WHERE id = ?"
+SELECT_RANDOM_ID = "SELECT id FROM quotes WHERE id >= ? ORDER BY id LIMIT 1"
+SELECT_MAX_ID = "SELECT MAX(id) FROM quotes"
+DELETE_QUOTE = "DELETE FROM quotes WHERE id = ?"
+# Only the newest SEARCH_WINDOW matches are ranked, so a search for a word
+# that is in half of all quotes costs the same as one for a rare word.
+SEARCH_WINDOW = 1000
+SEARCH_FTS = (
+    "SELECT q.id, q.text, q.added_by, q.added_at FROM ("
+    "SELECT rowid, rank FROM quotes_fts WHERE quotes_fts MATCH ? ORDER BY rowid DESC LIMIT ?"
+    ") AS m JOIN quotes q ON q.id = m.rowid ORDER BY m.rank LIMIT ?"
+)
+SEARCH_LIKE = "SELECT id, text, added_by, added_at FROM quotes WHERE text LIKE ? ESCAPE '\\' LIMIT ?"
+SELECT_COUNTER = "SELECT value FROM counters WHERE name = ?"
+UPSERT_COUNTER = (
+    "INSERT INTO counters (name, value) VALUES (?, ?) "
+    "ON CONFLICT(name) DO UPDATE SET value = excluded.value"
+)
+
+
+def fts_query(text):
+    """Turn chat input into an FTS5 query: every word must appear, the last one as a prefix."""
+    words = [word.replace('"', '""') for word in text.split()]
+    if not words:
+        return None
+    terms = [f'"{word}"' for word in words[:-1]]
+    terms.append(f'"{words[-1]}"*')
+    return " ".join(terms)
+
+
+class QuoteStore:
+    """
+    Quotes and named counters in an SQLite database (WAL mode, FTS5 search).
+
+    Every database call runs on one dedicated thread that owns the
+    connection, so the event loop never blocks on disk I/O. Counter changes
+    are applied in memory right away and written in a single transaction
+    every `flush_interval` seconds.
+    """
+
+    def __init__(self, path, flush_interval=15):
+        self.path = path
+        self.flush_interval = flush_interval
+        self.has_fts = False
+        self._conn = None
+        self._executor = concurrent.futures.ThreadPoolExecutor(
+            max_workers=1, thread_name_prefix="quote-store", initializer=self._open
+        )
+        self._counters = {}   # name -> value, for counters read or changed so far
+        self._dirty = set()
+        self._task = None
+
+    # ---- Database thread ----
+
+    def _open(self):
+        self._conn = sqlite3.connect(self.path, cached_statements=64)
+        self._conn.execute("PRAGMA journal_mode=WAL")
+        self._conn.execute("PRAGMA synchronous=NORMAL")
+        self._conn.executescript(SCHEMA)
+        try:
+            self._conn.executescript(FTS_SCHEMA)
+            self.has_fts = True
+        except sqlite3.OperationalError as e:
+            print(f"WARNING: SQLite FTS5 is not available ({e}); quote search falls back to LIKE.")
+        self._conn.commit()
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    # ---- Quotes ----
+
+    async def add_quote(self, text, added_by=None):
+        """Store a quote and return its number."""
+        return await self._run(self._add_quotes, [(text, added_by, time.time())])
+
+    async def add_quotes(self, rows):
+        """Store many (text, added_by) quotes in one transaction, e.g. for imports."""
+        now = time.time()
+        return await self._run(self._add_quotes, [(text, added_by, now) for text, added_by in rows])
+
+    def _add_quotes(self, rows):
+        with self._conn:
+            if len(rows) == 1:
+                return self._conn.execute(INSERT_QUOTE, rows[0]).lastrowid
+            self._conn.executemany(INSERT_QUOTE, rows)
+        return None
+
+    async def get_quote(self, number):
+        return await self._run(self._fetch_one, SELECT_QUOTE, (number,))
+
+    async def delete_quote(self, number):
+        return await self._run(self._delete_quote, number)
+
+    def _delete_quote(self, number):
+        with self._conn:
+            return self._conn.execute(DELETE_QUOTE, (number,)).rowcount > 0
+
+    async def random_quote(self):
+        return await self._run(self._random_quote)
+
+    def _random_quote(self):
+        max_id = self._conn.execute(SELECT_MAX_ID).fetchone()[0]
+        if not max_id:
+            return None
+        # Picking an id avoids ORDER BY RANDOM() scanning the whole table.
+        row = self._conn.execute(SELECT_RANDOM_ID, (random.randint(1, max_id),)).fetchone()
+        return self._fetch_one(SELECT_QUOTE, (row[0],)) if row else None
+
+    async def search(self, text, limit=1):
+        """Best matching quotes for `text`, most relevant first."""
+        return await self._run(self._search, text, limit)
+
+    def _search(self, text, limit):
+        if self.has_fts:
+            query = fts_query(text)
+            if query is None:
+                return []
+            rows = self._conn.execute(SEARCH_FTS, (query, SEARCH_WINDOW, limit)).fetchall()
+        else:
+            pattern = "%" + text.replace("\\", "\\\\").replace("%", "\\%").replace("_", "\\_") + "%"
+            rows = self._conn.execute(SEARCH_LIKE, (pattern, limit)).fetchall()
+        return [self._quote_dict(row) for row in rows]
+
+    def _fetch_one(self, sql, params):
+        row = self._conn.execute(sql, params).fetchone()
+        return self._quote_dict(row) if row else None
+
+    @staticmethod
+    def _quote_dict(row):
+        return {"id": row[0], "text": row[1], "added_by": row[2], "added_at": row[3]}
+
+    # ---- Counters ----
+
+    async def get_counter(self, name):
+        if name not in self._counters:
+            row = await self._run(self._fetch_counter, name)
+            # Another call may have changed the counter while we were reading.
+            self._counters.setdefault(name, row)
+        return self._counters[name]
+
+    def _fetch_counter(self, name):
+        row = self._conn.execute(SELECT_COUNTER, (name,)).fetchone()
+        return row[0] if row else 0
+
+    async def add_to_counter(self, name, amount=1):
+        value = await self.get_counter(name) + amount
+        self._counters[name] = value
+        self._dirty.add(name)
+        return value
+
+    async def set_counter(self, name, value):
+        self._counters[name] = value
+        self._dirty.add(name)
+        return value
+
+    def _take_dirty(self):
+        rows = [(name, self._counters[name]) for name in self._dirty]
+        self._dirty = set()
+        return rows
+
+    def _write_counters(self, rows):
+        with self._conn:
+            self._conn.executemany(UPSERT_COUNTER, rows)
+
+    async def flush(self):
+        rows = self._take_dirty()
+        if rows:
+            await self._run(self._write_counters, rows)
+
+    def start(self, loop):
+        """Start the periodic counter flush on the given event loop."""
+        if self._task is None:
+            self._task = loop.create_task(self._flush_loop())
+
+    async def _flush_loop(self):
+        while True:
+            await asyncio.sleep(self.flush_interval)
+            await self.flush()
+
+    def close(self):
+        """Write pending counters and close the database. Blocks until the thread is done."""
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        rows = self._take_dirty()
+        if rows:
+            self._executor.submit(self._write_counters, rows)
+        self._executor.submit(self._close_connection)
+        self._executor.shutdown(wait=True)
+
+    def _close_connection(self):
+        if self._conn is not None:
+            self._conn.close()
+            self._conn = None
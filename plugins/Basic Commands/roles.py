@@ -0,0 +1,193 @@
+import time
+from collections import OrderedDict
+from datetime import datetime, timezone
+
+from snapshots import to_monotonic, to_wall_clock
+
+# Roles that need a Helix lookup instead of coming from the IRC tags.
+HELIX_ROLES = ("follower",)
+
+
+class Roles:
+    """The roles of one chatter for one message."""
+
+    __slots__ = ("login", "user_id", "names", "level", "followed_at", "levels")
+
+    def __init__(self, login, user_id, names, levels, followed_at=None):
+        self.login = login
+        self.user_id = user_id
+        self.names = names
+        self.levels = levels
+        self.followed_at = followed_at
+        self.level = max((levels[name] for name in names if name in levels), default=0)
+
+    def has(self, role):
+        return role in self.names
+
+    def at_least(self, role):
+        """True if the chatter's highest role is `role` or above it."""
+        return self.level >= self.levels[role]
+
+
+class RoleResolver:
+    """
+    Works out a chatter's roles when they use a command.
+
+    Broadcaster, moderator, VIP and subscriber come straight from the IRCv3
+    badges on the message, so they cost nothing. Follower status needs a Helix
+    call; it is only looked up when a command actually requires it, and the
+    answer is kept per user in an LRU table with a TTL. Roles granted with
+    !grant are stored in the plugin's data file.
+    """
+
+    def __init__(self, bot, levels, data_path, read_data, update_data, ttl=600, max_entries=5000):
+        self.bot = bot
+        self.levels = levels
+        self.data_path = data_path
+        self.update_data = update_data
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self.follows = OrderedDict()  # user id -> (expires, followed_at or None)
+        self.grants = read_data(data_path).get("role_grants", {})
+
+    # ---- Badge roles ----
+
+    def badge_roles(self, message):
+        """Roles that can be read from the message itself."""
+        names = {"viewer"}
+        tags = getattr(message, "tags", None)
+        author = message.author
+
+        if tags:
+            badges = tags.get("badges") or ""
+            for badge in badges.split(","):
+                badge_name = badge.split("/", 1)[0]
+                if badge_name == "broadcaster":
+                    names.add("broadcaster")
+                elif badge_name == "moderator":
+                    names.add("moderator")
+                elif badge_name == "vip":
+                    names.add("vip")
+                elif badge_name in ("subscriber", "founder"):
+                    names.add("subscriber")
+            if str(tags.get("mod")) == "1":
+                names.add("moderator")
+            if tags.get("vip"):
+                names.add("vip")
+        else:
+            names.update(self.chatter_roles(author))
+
+        grant = self.grants.get(author.name.lower())
+        if grant:
+            names.add(grant)
+        return names
+
+    def chatter_roles(self, user):
+        """Roles from a twitchio Chatter's properties, for when no tags are at hand."""
+        names = {"viewer"}
+        if getattr(user, "is_broadcaster", False):
+            names.add("broadcaster")
+        if getattr(user, "is_mod", False):
+            names.add("moderator")
+        if getattr(user, "is_vip", False):
+            names.add("vip")
+        if getattr(user, "is_subscriber", False):
+            names.add("subscriber")
+        grant = self.grants.get(user.name.lower())
+        if grant:
+            names.add(grant)
+        return names
+
+    def level_of(self, names):
+        return max((self.levels[name] for name in names if name in self.levels), default=0)
+
+    def badge_level(self, message):
+        """Level from badges and grants alone, without any Helix lookup."""
+        return self.level_of(self.badge_roles(message))
+
+    # ---- Resolution ----
+
+    async def resolve(self, message, required_level=0, min_follow_days=0):
+        """
+        Resolve the author's roles once for this message. Helix-derived roles
+        are only looked up when the badges alone don't reach `required_level`
+        and a Helix role could. Viewers only count as followers once they have
+        followed for `min_follow_days`.
+        """
+        author = message.author
+        tags = getattr(message, "tags", None) or {}
+        user_id = tags.get("user-id") or getattr(author, "id", None)
+        names = self.badge_roles(message)
+        roles = Roles(author.name.lower(), user_id, names, self.levels)
+
+        if roles.level >= required_level or not user_id:
+            return roles
+
+        if any(self.levels[role] >= required_level for role in HELIX_ROLES):
+            followed_at = await self.get_followed_at(user_id)
+            if followed_at and self.follow_days(followed_at) >= min_follow_days:
+                names.add("follower")
+            roles = Roles(author.name.lower(), user_id, names, self.levels, followed_at)
+
+        return roles
+
+    @staticmethod
+    def follow_days(followed_at):
+        start = datetime.strptime(followed_at, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        return (datetime.now(timezone.utc) - start).days
+
+    async def get_followed_at(self, user_id):
+        """When the user followed the broadcaster, or None. Cached with LRU eviction."""
+        entry = self.follows.get(user_id)
+        if entry and entry[0] > time.monotonic():
+            self.follows.move_to_end(user_id)
+            return entry[1]
+
+        followed_at, ok = await self.fetch_followed_at(user_id)
+        # Errors are only remembered briefly, so a missing scope doesn't stick for the full TTL.
+        ttl = self.ttl if ok else min(self.ttl, 60)
+        self.follows[user_id] = (time.monotonic() + ttl, followed_at)
+        self.follows.move_to_end(user_id)
+        while len(self.follows) > self.max_entries:
+            self.follows.popitem(last=False)
+        return followed_at
+
+    async def fetch_followed_at(self, user_id):
+        """Returns (followed_at or None, whether the lookup succeeded)."""
+        broadcaster_id = self.bot.oauth_data.get("broadcaster_id")
+        if not broadcaster_id:
+            print("Missing OAuth configuration for follower lookups.")
+            return None, False
+
+        # Requires the moderator:read:followers scope.
+        params = {"broadcaster_id": broadcaster_id, "user_id": user_id}
+        status, data = await self.bot.helix.request("GET", "channels/followers", params=params)
+        if status == 200:
+            if data.get("data"):
+                return data["data"][0].get("followed_at"), True
+            return None, True
+        print(f"Failed to fetch follower info: {status} - {data}")
+        return None, False
+
+    def dump_state(self):
+        return [(user_id, to_wall_clock(expires), followed_at)
+                for user_id, (expires, followed_at) in self.follows.items()]
+
+    def restore_state(self, entries):
+        now = time.monotonic()
+        for user_id, expires, followed_at in entries:
+            expires = to_monotonic(expires)
+            if expires > now:
+                self.follows[user_id] = (expires, followed_at)
+
+    # ---- Grants ----
+
+    def grant(self, login, role):
+        self.grants[login.lower()] = role
+        self.update_data(self.data_path, "role_grants", self.grants)
+
+    def revoke(self, login):
+        if self.grants.pop(login.lower(), None) is None:
+            return False
+        self.update_data(self.data_path, "role_grants", self.grants)
+        return True
@@ -0,0 +1,143 @@
+import asyncio
+import time
+from collections import deque
+
+import aiohttp
+
+from snapshots import to_monotonic, to_wall_clock
+
+# Twitch allows one shoutout per channel every 2 minutes, and the same
+# streamer to be shouted out by a channel once an hour.
+CHANNEL_COOLDOWN = 120
+TARGET_COOLDOWN = 3600
+
+
+class ShoutoutQueue:
+    """
+    Native /helix/chat/shoutouts, queued per channel to respect the cooldowns.
+
+    During a raid train mods can !so several streamers in a row; the first
+    goes out right away and the rest follow one per cooldown on the bot's
+    scheduler. A shoutout rejected with 429 for the channel cooldown goes back
+    to the front of the queue; one rejected because that streamer already got a
+    shoutout this hour is dropped, so it doesn't hold up the others.
+    """
+
+    scope = "moderator:manage:shoutouts"
+
+    def __init__(self, bot, channel_cooldown=CHANNEL_COOLDOWN, target_cooldown=TARGET_COOLDOWN):
+        self.bot = bot
+        self.channel_cooldown = channel_cooldown
+        self.target_cooldown = target_cooldown
+        self.queues = {}        # broadcaster id -> deque of (user id, name)
+        self.next_allowed = {}  # broadcaster id -> monotonic time
+        self.last_sent = {}     # (broadcaster id, user id) -> monotonic time
+        self.jobs = {}          # broadcaster id -> scheduler job id
+
+    def enqueue(self, broadcaster_id, user_id, name):
+        """
+        Queue a shoutout. Returns ("queued", seconds until it goes out),
+        ("duplicate", 0) if it is already queued, or ("recent", seconds until
+        that streamer can be shouted out again).
+        """
+        now = time.monotonic()
+        queue = self.queues.setdefault(broadcaster_id, deque())
+        if any(queued_id == user_id for queued_id, _ in queue):
+            return "duplicate", 0
+
+        last = self.last_sent.get((broadcaster_id, user_id))
+        if last is not None and now - last < self.target_cooldown:
+            return "recent", int(last + self.target_cooldown - now)
+
+        queue.append((user_id, name))
+        wait = max(self.next_allowed.get(broadcaster_id, 0) - now, 0) + self.channel_cooldown * (len(queue) - 1)
+        if broadcaster_id not in self.jobs:
+            self._schedule(broadcaster_id)
+        return "queued", int(wait)
+
+    def _schedule(self, broadcaster_id):
+        delay = max(self.next_allowed.get(broadcaster_id, 0) - time.monotonic(), 0)
+
+        async def send_next():
+            self.jobs.pop(broadcaster_id, None)
+            await self._send_next(broadcaster_id)
+
+        self.jobs[broadcaster_id] = self.bot.scheduler.schedule(send_next, delay)
+
+    async def _send_next(self, broadcaster_id):
+        queue = self.queues.get(broadcaster_id)
+        if not queue:
+            return
+
+        user_id, name = queue.popleft()
+        # Counted as sent while the request is in flight, so a repeated !so
+        # for the same streamer isn't queued again meanwhile.
+        previous = self.last_sent.get((broadcaster_id, user_id))
+        self.last_sent[(broadcaster_id, user_id)] = time.monotonic()
+        params = {
+            "from_broadcaster_id": broadcaster_id,
+            "to_broadcaster_id": user_id,
+            "moderator_id": self.bot.tokens.user_id or broadcaster_id
+        }
+        try:
+            status, data = await self.bot.helix.request("POST", "chat/shoutouts", params=params)
+        except (aiohttp.ClientError, asyncio.TimeoutError) as e:
+            status, data = None, e
+        now = time.monotonic()
+        if status == 204:
+            self.next_allowed[broadcaster_id] = now + self.channel_cooldown
+        else:
+            self._restore_last_sent(broadcaster_id, user_id, previous)
+            if status == 429 and self._is_target_cooldown(data):
+                # Shouted out from Twitch's own UI this hour; retrying only blocks the queue.
+                print(f"Shoutout for {name} skipped: they already got one in the last hour.")
+            elif status == 429:
+                # Still cooling down, e.g. after a shoutout sent from Twitch's own UI.
+                queue.appendleft((user_id, name))
+                self.next_allowed[broadcaster_id] = now + self.channel_cooldown
+            else:
+                print(f"Shoutout for {name} failed: {status} - {data}")
+
+        if queue:
+            self._schedule(broadcaster_id)
+
+    @staticmethod
+    def _is_target_cooldown(data):
+        """Whether a 429 is for the per-streamer cooldown rather than the channel one."""
+        message = data.get("message", "") if isinstance(data, dict) else str(data)
+        return "same" in message.lower() or "60 minutes" in message
+
+    def _restore_last_sent(self, broadcaster_id, user_id, previous):
+        if previous is None:
+            self.last_sent.pop((broadcaster_id, user_id), None)
+        else:
+            self.last_sent[(broadcaster_id, user_id)] = previous
+
+    def close(self):
+        for job_id in self.jobs.values():
+            self.bot.scheduler.cancel(job_id)
+        self.jobs = {}
+
+    def dump_state(self):
+        return {
+            "queues": {broadcaster_id: list(queue) for broadcaster_id, queue in self.queues.items() if queue},
+            "next_allowed": {broadcaster_id: to_wall_clock(at) for broadcaster_id, at in self.next_allowed.items()},
+            "last_sent": [(broadcaster_id, user_id, to_wall_clock(at))
+                          for (broadcaster_id, user_id), at in self.last_sent.items()]
+        }
+
+    def restore_state(self, state):
+        now = time.monotonic()
+        for broadcaster_id, at in state.get("next_allowed", {}).items():
+            self.next_allowed[broadcaster_id] = to_monotonic(at)
+        for broadcaster_id, user_id, at in state.get("last_sent", []):
+            at = to_monotonic(at)
+            if now - at < self.target_cooldown:
+                self.last_sent[(broadcaster_id, user_id)] = at
+        for broadcaster_id, queued in state.get("queues", {}).items():
+            queue = self.queues.setdefault(broadcaster_id, deque())
+            for user_id, name in queued:
+                if all(queued_id != user_id for queued_id, _ in queue):
+                    queue.append((user_id, name))
+            if queue and broadcaster_id not in self.jobs:
+                self._schedule(broadcaster_id)
@@ -0,0 +1,211 @@
+import asyncio
+import random
+import re
+import time
+from datetime import datetime, timezone
+
+from snapshots import to_monotonic, to_wall_clock
+
+# Matches $(name) and $(name some arguments)
+VARIABLE_PATTERN = re.compile(r"\$\((\w+)(?:\s+([^)]*))?\)")
+
+
+class Template:
+    """
+    A command response compiled into a render plan.
+
+    `parts` is a list where each item is either a literal string or a
+    (provider, name, arg) tuple. Responses without any variables are marked
+    static so rendering them is just returning the source string.
+    """
+
+    __slots__ = ("source", "parts", "is_static")
+
+    def __init__(self, source, parts):
+        self.source = source
+        self.parts = parts
+        self.is_static = all(isinstance(part, str) for part in parts)
+
+
+class TemplateEngine:
+    """
+    Compiles and renders custom command responses.
+
+    Supported variables:
+        $(user)             name of the chatter who used the command
+        $(touser)           first argument (without @), or the chatter if none given
+        $(count)            per-command use counter, kept with the !counter counters
+        $(uptime)           how long the broadcaster has been live
+        $(game)             the broadcaster's current category
+        $(random a|b|c)     one of the options, picked at random
+
+    Unknown variables are left in the response as written.
+    """
+
+    # Providers whose value may differ when used twice in the same response.
+    VOLATILE = {"random"}
+
+    def __init__(self, bot, counters, cache_ttl=60):
+        self.bot = bot
+        self.counters = counters
+        self.cache_ttl = cache_ttl
+        self._cache = {}
+        self._pending = {}
+
+        self.providers = {
+            "user": self._provide_user,
+            "touser": self._provide_touser,
+            "count": self._provide_count,
+            "uptime": self._provide_uptime,
+            "game": self._provide_game,
+            "random": self._provide_random,
+        }
+
+    def compile(self, source):
+        """Parse a response string once into a Template."""
+        parts = []
+        position = 0
+
+        for match in VARIABLE_PATTERN.finditer(source):
+            name = match.group(1).lower()
+            provider = self.providers.get(name)
+            if provider is None:
+                continue
+
+            if match.start() > position:
+                parts.append(source[position:match.start()])
+
+            arg = (match.group(2) or "").strip()
+            if name == "random":
+                # Split the choices now instead of on every use.
+                arg = tuple(choice.strip() for choice in arg.split("|") if choice.strip())
+
+            parts.append((provider, name, arg))
+            position = match.end()
+
+        if position < len(source):
+            parts.append(source[position:])
+
+        return Template(source, parts)
+
+    async def render(self, template, ctx, command):
+        """Produce the final message for a compiled template."""
+        if template.is_static:
+            return template.source
+
+        # Each variable is resolved once per message, so a response that
+        # uses $(count) twice only increments the counter once.
+        resolved = {}
+        output = []
+        for part in template.parts:
+            if isinstance(part, str):
+                output.append(part)
+                continue
+
+            provider, name, arg = part
+            key = (name, arg)
+            if name in self.VOLATILE or key not in resolved:
+                resolved[key] = await provider(ctx, command, arg)
+            output.append(str(resolved[key]))
+
+        return "".join(output)
+
+    # ---- Variable providers ----
+
+    async def _provide_user(self, ctx, command, arg):
+        return ctx.author.name
+
+    async def _provide_touser(self, ctx, command, arg):
+        parts = ctx.message.content.strip().split()
+        if len(parts) > 1:
+            return parts[1].lstrip("@")
+        return ctx.author.name
+
+    async def _provide_count(self, ctx, command, arg):
+        return await self.counters.add_to_counter(command)
+
+    async def _provide_random(self, ctx, command, arg):
+        if not arg:
+            return ""
+        return random.choice(arg)
+
+    async def _provide_uptime(self, ctx, command, arg):
+        started_at = await self._cached("stream_started_at", self._fetch_stream_started_at)
+        if not started_at:
+            return "offline"
+
+        start = datetime.strptime(started_at, "%Y-%m-%dT%H:%M:%SZ").replace(tzinfo=timezone.utc)
+        seconds = int((datetime.now(timezone.utc) - start).total_seconds())
+        hours, remainder = divmod(seconds, 3600)
+        minutes = remainder // 60
+        if hours:
+            return f"{hours}h {minutes}m"
+        return f"{minutes}m"
+
+    async def _provide_game(self, ctx, command, arg):
+        game_name = await self._cached("game_name", self._fetch_game_name)
+        return game_name or "unknown"
+
+    # ---- Helix lookups ----
+
+    async def _cached(self, key, fetch):
+        """
+        Return a cached Helix value, fetching it when missing or expired.
+        Concurrent callers for the same key share a single request.
+        """
+        entry = self._cache.get(key)
+        if entry and entry[0] > time.monotonic():
+            return entry[1]
+
+        pending = self._pending.get(key)
+        if pending is None:
+            pending = asyncio.ensure_future(fetch())
+            self._pending[key] = pending
+            try:
+                value = await asyncio.shield(pending)
+            finally:
+                self._pending.pop(key, None)
+            # Failed lookups (None) are cached too, so an API outage doesn't
+            # turn every message into another request.
+            self._cache[key] = (time.monotonic() + self.cache_ttl, value)
+            return value
+
+        return await asyncio.shield(pending)
+
+    def dump_state(self):
+        return {key: (to_wall_clock(expires), value) for key, (expires, value) in self._cache.items()}
+
+    def restore_state(self, cache):
+        now = time.monotonic()
+        for key, (expires, value) in cache.items():
+            expires = to_monotonic(expires)
+            if expires > now:
+                self._cache[key] = (expires, value)
+
+    async def _fetch_stream_started_at(self):
+        broadcaster_id = self.bot.oauth_data.get("broadcaster_id")
+        if not broadcaster_id:
+            print("Missing OAuth configuration for $(uptime).")
+            return None
+
+        status, data = await self.bot.helix.request("GET", "streams", params={"user_id": broadcaster_id})
+        if status == 200:
+            if "data" in data and data["data"]:
+                return data["data"][0].get("started_at")
+        else:
+            print(f"Failed to fetch stream info: {status} - {data}")
+        return None
+
+    async def _fetch_game_name(self):
+        broadcaster_id = self.bot.oauth_data.get("broadcaster_id")
+        if not broadcaster_id:
+            print("Missing OAuth configuration for $(game).")
+            return None
+
+        status, data = await self.bot.helix.request("GET", "channels", params={"broadcaster_id": broadcaster_id})
+        if status == 200:
+            if "data" in data and data["data"]:
+                return data["data"][0].get("game_name")
+        else:
+            print(f"Failed to fetch channel info: {status} - {data}")
+        return None
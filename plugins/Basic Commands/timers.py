@@ -0,0 +1,71 @@
+class TimerManager:
+    """
+    Chat-defined recurring messages (socials, sponsor reads, ...).
+
+    Definitions are stored per channel in the plugin's data file under
+    "timers" ({channel: {name: timer}}) so they survive restarts; the bot's
+    Scheduler does the actual timing.
+    """
+
+    def __init__(self, bot, data_path, read_data, update_data):
+        self.bot = bot
+        self.data_path = data_path
+        self.update_data = update_data
+        self.timers = read_data(data_path).get("timers", {})
+        self.jobs = {}  # (channel, name) -> scheduler job id
+
+    def channel_timers(self, channel):
+        return self.timers.get(channel, {})
+
+    def start_all(self):
+        for channel, timers in self.timers.items():
+            for name in timers:
+                self._start(channel, name)
+
+    def _start(self, channel, name):
+        timer = self.timers[channel][name]
+
+        async def announce():
+            target = self.bot.get_channel(channel)
+            if target is None:
+                print(f"Timer '{name}': not connected to channel '{channel}'.")
+                return
+            await target.send(timer["message"])
+
+        interval = timer["interval"] * 60
+        self.jobs[(channel, name)] = self.bot.scheduler.schedule(
+            announce, interval, interval=interval,
+            channel=channel, min_lines=timer["min_lines"]
+        )
+
+    def _stop(self, channel, name):
+        job_id = self.jobs.pop((channel, name), None)
+        if job_id is not None:
+            self.bot.scheduler.cancel(job_id)
+
+    def add(self, name, channel, interval, min_lines, message):
+        """Create or replace a channel's timer. `interval` is in minutes."""
+        self._stop(channel, name)
+        self.timers.setdefault(channel, {})[name] = {
+            "channel": channel,
+            "interval": interval,
+            "min_lines": min_lines,
+            "message": message
+        }
+        self.update_data(self.data_path, "timers", self.timers)
+        self._start(channel, name)
+
+    def remove(self, name, channel):
+        if name not in self.channel_timers(channel):
+            return False
+        self._stop(channel, name)
+        del self.timers[channel][name]
+        if not self.timers[channel]:
+            del self.timers[channel]
+        self.update_data(self.data_path, "timers", self.timers)
+        return True
+
+    def close(self):
+        """Cancel all scheduled jobs, e.g. before the plugin is reloaded."""
+        for channel, name in list(self.jobs):
+            self._stop(channel, name)
@@ -0,0 +1,135 @@
+import asyncio
+import heapq
+import itertools
+import time
+import traceback
+
+
+class ScheduledJob:
+    __slots__ = ("id", "callback", "deadline", "interval", "channel", "min_lines", "lines_at_last_run", "cancelled")
+
+    def __init__(self, job_id, callback, deadline, interval, channel, min_lines, lines_at_last_run):
+        self.id = job_id
+        self.callback = callback
+        self.deadline = deadline
+        self.interval = interval
+        self.channel = channel
+        self.min_lines = min_lines
+        self.lines_at_last_run = lines_at_last_run
+        self.cancelled = False
+
+
+class Scheduler:
+    """
+    Runs delayed and recurring jobs from a single task.
+
+    Deadlines live in a min-heap, so adding a job is O(log n) and the task
+    only ever sleeps until the earliest one. Cancelled jobs are marked and
+    skipped when they reach the top of the heap; the heap is compacted when
+    they make up more than half of it.
+
+    Recurring jobs can require `min_lines` chat messages in their channel since
+    they last ran. When a job comes due without enough chat activity it is
+    skipped until its next interval, so announcements don't pile up in an
+    empty chat. Chat lines are counted by calling note_message().
+    """
+
+    def __init__(self):
+        self._heap = []  # (deadline, sequence, job)
+        self._jobs = {}
+        self._ids = itertools.count(1)
+        self._sequence = itertools.count()
+        self._stale = 0
+        self._wakeup = None
+        self._task = None
+        self.chat_lines = {}  # channel name -> messages seen
+
+    def note_message(self, channel):
+        """Count one chat line for `channel`. Called for every message, so keep it cheap."""
+        self.chat_lines[channel] = self.chat_lines.get(channel, 0) + 1
+
+    def schedule(self, callback, delay, interval=None, channel=None, min_lines=0):
+        """
+        Run the coroutine function `callback()` after `delay` seconds, and then
+        every `interval` seconds if given. Returns a job id for cancel().
+        """
+        job_id = next(self._ids)
+        channel = channel.lower() if channel else None
+        job = ScheduledJob(
+            job_id, callback, time.monotonic() + delay, interval,
+            channel, min_lines, self.chat_lines.get(channel, 0)
+        )
+        self._jobs[job_id] = job
+        self._push(job)
+        return job_id
+
+    def call_later(self, delay, callback):
+        """Run `callback()` once after `delay` seconds."""
+        return self.schedule(callback, delay)
+
+    def cancel(self, job_id):
+        job = self._jobs.pop(job_id, None)
+        if job is None:
+            return False
+        job.cancelled = True
+        self._stale += 1
+        if self._stale > len(self._heap) // 2:
+            self._compact()
+        return True
+
+    def _push(self, job):
+        heapq.heappush(self._heap, (job.deadline, next(self._sequence), job))
+        # Only wake the task if this job is now the earliest one.
+        if self._wakeup is not None and self._heap[0][2] is job:
+            self._wakeup.set()
+
+    def _compact(self):
+        self._heap = [entry for entry in self._heap if not entry[2].cancelled]
+        heapq.heapify(self._heap)
+        self._stale = 0
+
+    def start(self, loop):
+        if self._task is None:
+            self._wakeup = asyncio.Event()
+            self._task = loop.create_task(self._run())
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            now = time.monotonic()
+            while self._heap and self._heap[0][0] <= now:
+                deadline, _, job = heapq.heappop(self._heap)
+                if job.cancelled:
+                    self._stale -= 1
+                    continue
+                self._fire(job, now)
+
+            timeout = self._heap[0][0] - now if self._heap else None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), timeout)
+            except asyncio.TimeoutError:
+                pass
+
+    def _fire(self, job, now):
+        lines = self.chat_lines.get(job.channel, 0)
+        if lines - job.lines_at_last_run >= job.min_lines:
+            job.lines_at_last_run = lines
+            asyncio.ensure_future(self._invoke(job))
+
+        if job.interval:
+            job.deadline = now + job.interval
+            heapq.heappush(self._heap, (job.deadline, next(self._sequence), job))
+        else:
+            self._jobs.pop(job.id, None)
+
+    async def _invoke(self, job):
+        try:
+            await job.callback()
+        except Exception as e:
+            print(f"Scheduled job {job.id} failed: {e}")
+            traceback.print_exc()
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
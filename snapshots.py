@@ -0,0 +1,148 @@
+import asyncio
+import io
+import os
+import pickle
+import time
+import zlib
+
+# Bump when the layout of the snapshot file itself changes.
+SNAPSHOT_FORMAT = 1
+
+
+def to_wall_clock(deadline):
+    """Convert a time.monotonic() deadline to a time.time() one, for saving."""
+    return time.time() + (deadline - time.monotonic())
+
+def to_monotonic(deadline):
+    """Convert a saved time.time() deadline back to time.monotonic()."""
+    return time.monotonic() + (deadline - time.time())
+
+
+class _PlainDataUnpickler(pickle.Unpickler):
+    """Only allows plain data (dicts, lists, strings, numbers...) to be loaded."""
+
+    def find_class(self, module, name):
+        raise pickle.UnpicklingError(f"Snapshot contains a non-plain object: {module}.{name}")
+
+
+class SnapshotManager:
+    """
+    Keeps plugin state (caches, cooldowns, runtime commands) across restarts
+    and plugin reloads.
+
+    Plugins call register(name, version, dump, restore). `dump()` returns
+    plain data (dicts, lists, tuples, strings, numbers); `restore(data)` puts
+    it back. If saved state for `name` with the same version is waiting when
+    the plugin registers, restore is called right away; a different version
+    is dropped, since the plugin can't be expected to read it.
+
+    State is kept in memory across load_plugins() and written to disk as a
+    zlib-compressed pickle periodically and on shutdown.
+    """
+
+    def __init__(self, path, interval=300):
+        self.path = path
+        self.interval = interval
+        self.providers = {}  # name -> (version, dump, restore)
+        self.pending = {}    # name -> {"version": ..., "data": ...}
+        self._task = None
+
+    def register(self, name, version, dump, restore):
+        self.providers[name] = (version, dump, restore)
+
+        section = self.pending.pop(name, None)
+        if section is None:
+            return
+        if section["version"] != version:
+            print(f"Discarding saved state for '{name}' (version {section['version']}, expected {version}).")
+            return
+        try:
+            restore(section["data"])
+        except Exception as e:
+            print(f"Failed to restore state for '{name}': {e}")
+
+    def unregister(self, name):
+        """Stop tracking a provider, keeping its current state for whoever registers next."""
+        if name in self.providers:
+            self._capture_one(name)
+            del self.providers[name]
+
+    def _capture_one(self, name):
+        version, dump, restore = self.providers[name]
+        try:
+            self.pending[name] = {"version": version, "data": dump()}
+        except Exception as e:
+            print(f"Failed to capture state for '{name}': {e}")
+
+    def capture(self):
+        """
+        Take the state of every provider into memory and forget the providers.
+        Called before plugins are reloaded; the new instances get it back when
+        they register.
+        """
+        for name in list(self.providers):
+            self._capture_one(name)
+        self.providers = {}
+
+    # ---- Disk ----
+
+    def load(self):
+        """Read the snapshot file into pending state. Missing or unreadable files are ignored."""
+        if not os.path.isfile(self.path):
+            return
+        try:
+            with open(self.path, "rb") as f:
+                raw = zlib.decompress(f.read())
+            snapshot = _PlainDataUnpickler(io.BytesIO(raw)).load()
+        except Exception as e:
+            print(f"Ignoring unreadable snapshot '{self.path}': {e}")
+            return
+
+        if not isinstance(snapshot, dict) or snapshot.get("format") != SNAPSHOT_FORMAT:
+            print(f"Ignoring snapshot '{self.path}' written in an unknown format.")
+            return
+
+        age = time.time() - snapshot.get("saved_at", 0)
+        self.pending.update(snapshot.get("sections", {}))
+        print(f"Loaded state snapshot ({len(self.pending)} sections, {int(age)}s old).")
+
+    def save(self):
+        """Write the state of all providers (and any unclaimed sections) to disk."""
+        sections = dict(self.pending)
+        for name in self.providers:
+            version, dump, restore = self.providers[name]
+            try:
+                sections[name] = {"version": version, "data": dump()}
+            except Exception as e:
+                print(f"Failed to capture state for '{name}': {e}")
+
+        snapshot = {
+            "format": SNAPSHOT_FORMAT,
+            "saved_at": time.time(),
+            "sections": sections
+        }
+
+        tmp_path = self.path + ".tmp"
+        try:
+            payload = zlib.compress(pickle.dumps(snapshot, protocol=5), 1)
+            with open(tmp_path, "wb") as f:
+                f.write(payload)
+            os.replace(tmp_path, self.path)
+        except (OSError, pickle.PicklingError, TypeError) as e:
+            print(f"Failed to save state snapshot: {e}")
+
+    def start(self, loop):
+        """Start saving periodically on the given event loop."""
+        if self._task is None:
+            self._task = loop.create_task(self._save_loop())
+
+    async def _save_loop(self):
+        while True:
+            await asyncio.sleep(self.interval)
+            self.save()
+
+    def close(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+        self.save()
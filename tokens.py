@@ -0,0 +1,193 @@
+import asyncio
+import json
+import os
+
+import aiohttp
+
+VALIDATE_URL = "https://id.twitch.tv/oauth2/validate"
+TOKEN_URL = "https://id.twitch.tv/oauth2/token"
+
+# Twitch asks apps to validate their tokens at least once an hour.
+VALIDATE_INTERVAL = 3600
+
+# Refresh this long before the token would expire.
+REFRESH_MARGIN = 900
+
+
+class TokenManager:
+    """
+    Keeps the bot's OAuth token valid.
+
+    The token is validated on startup and every hour. When it is close to
+    expiring (or already rejected) and oauth.json has a `refresh_token` and
+    `client_secret`, a new token is fetched in the background, written back to
+    oauth.json and handed to `on_token_changed`. Commands never wait on any of
+    this; they just see the new token on their next request.
+
+    The endpoint URLs can be pointed at a local fake OAuth server for testing.
+    """
+
+    def __init__(self, oauth_data, oauth_path="oauth.json", on_token_changed=None,
+                 validate_url=VALIDATE_URL, token_url=TOKEN_URL):
+        self.oauth_data = oauth_data
+        self.oauth_path = oauth_path
+        self.on_token_changed = on_token_changed
+        self.validate_url = validate_url
+        self.token_url = token_url
+
+        self.scopes = None      # set of scopes once validated
+        self.login = None
+        self.user_id = None
+        self.expires_in = None
+        self.requirements = {}  # command -> scopes it needs
+        self._scheduler = None
+        self._validate_job = None
+        self._refresh_job = None
+        self._check_task = None
+
+    @property
+    def can_refresh(self):
+        return bool(self.oauth_data.get("refresh_token") and self.oauth_data.get("client_secret"))
+
+    # ---- Scopes ----
+
+    def require_scopes(self, command, scopes):
+        """Note the scopes a command needs; warns now if the token is already known to lack them."""
+        self.requirements[command] = set(scopes)
+        missing = self.missing_scopes(scopes)
+        if missing:
+            print(f"WARNING: {command} needs the scope(s) {', '.join(sorted(missing))}, which the token does not have.")
+
+    def missing_scopes(self, scopes):
+        """Scopes from `scopes` the token lacks. Empty while the token hasn't been validated yet."""
+        if not scopes or self.scopes is None:
+            return set()
+        return set(scopes) - self.scopes
+
+    def _report_missing_scopes(self):
+        for command, scopes in self.requirements.items():
+            missing = self.missing_scopes(scopes)
+            if missing:
+                print(f"WARNING: {command} needs the scope(s) {', '.join(sorted(missing))}, which the token does not have.")
+
+    # ---- Validation and refresh ----
+
+    async def validate(self):
+        """
+        Validate the current token, refreshing it if it was rejected or is
+        about to expire. Returns the validation data, or None if there is no
+        usable token.
+        """
+        data = await self._fetch_validation()
+        if data is None and self.can_refresh:
+            print("Token was rejected, trying to refresh it.")
+            if await self.refresh():
+                data = await self._fetch_validation()
+
+        if data is None:
+            self.scopes = None
+            return None
+
+        self.scopes = set(data.get("scopes") or [])
+        self.login = data.get("login")
+        self.user_id = data.get("user_id")
+        self.expires_in = data.get("expires_in")
+        self._report_missing_scopes()
+        self._schedule_refresh()
+        return data
+
+    async def _fetch_validation(self):
+        headers = {"Authorization": f"OAuth {self.oauth_data['oauth_token']}"}
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.get(self.validate_url, headers=headers) as response:
+                    if response.status == 200:
+                        return await response.json()
+                    print(f"Token validation failed: {response.status} - {await response.text()}")
+        except aiohttp.ClientError as e:
+            print(f"Token validation failed: {e}")
+        return None
+
+    async def refresh(self):
+        """Exchange the refresh token for a new access token. Returns True on success."""
+        if not self.can_refresh:
+            return False
+
+        payload = {
+            "grant_type": "refresh_token",
+            "refresh_token": self.oauth_data["refresh_token"],
+            "client_id": self.oauth_data["client_id"],
+            "client_secret": self.oauth_data["client_secret"]
+        }
+        try:
+            async with aiohttp.ClientSession() as session:
+                async with session.post(self.token_url, data=payload) as response:
+                    if response.status != 200:
+                        print(f"Token refresh failed: {response.status} - {await response.text()}")
+                        return False
+                    data = await response.json()
+        except aiohttp.ClientError as e:
+            print(f"Token refresh failed: {e}")
+            return False
+
+        self.oauth_data["oauth_token"] = data["access_token"]
+        if data.get("refresh_token"):
+            self.oauth_data["refresh_token"] = data["refresh_token"]
+        if data.get("expires_in"):
+            self.expires_in = data["expires_in"]
+        self._save_oauth_file()
+
+        if self.on_token_changed is not None:
+            self.on_token_changed(data["access_token"])
+        print("OAuth token refreshed.")
+        return True
+
+    def _save_oauth_file(self):
+        """Write the new token back so a restart doesn't start with the old one."""
+        if not self.oauth_path or not os.path.isfile(self.oauth_path):
+            return
+        saved = {key: value for key, value in self.oauth_data.items() if key != "broadcaster_id"}
+        tmp_path = self.oauth_path + ".tmp"
+        try:
+            with open(tmp_path, "w") as f:
+                json.dump(saved, f, indent=4)
+            os.replace(tmp_path, self.oauth_path)
+        except OSError as e:
+            print(f"Failed to save refreshed token to {self.oauth_path}: {e}")
+
+    # ---- Background schedule ----
+
+    def start(self, scheduler):
+        """Validate hourly on the bot's scheduler (the startup validation is done separately)."""
+        self._scheduler = scheduler
+        if self._validate_job is None:
+            self._validate_job = scheduler.schedule(self.validate, VALIDATE_INTERVAL, interval=VALIDATE_INTERVAL)
+        self._schedule_refresh()
+
+    def _schedule_refresh(self):
+        if self._scheduler is None or not self.can_refresh or not self.expires_in:
+            return
+        if self._refresh_job is not None:
+            self._scheduler.cancel(self._refresh_job)
+        delay = max(self.expires_in - REFRESH_MARGIN, 0)
+        self._refresh_job = self._scheduler.schedule(self._scheduled_refresh, delay)
+
+    async def _scheduled_refresh(self):
+        self._refresh_job = None
+        if await self.refresh():
+            await self.validate()
+
+    def request_check(self):
+        """
+        Called when an API request got a 401. Validates (and refreshes) in the
+        background; the failed request itself is not retried.
+        """
+        if self._check_task is None or self._check_task.done():
+            self._check_task = asyncio.ensure_future(self.validate())
+
+    def close(self):
+        if self._scheduler is not None:
+            for job in (self._validate_job, self._refresh_job):
+                if job is not None:
+                    self._scheduler.cancel(job)
+        self._validate_job = self._refresh_job = None